@@ -0,0 +1,141 @@
+"""
+Tests for saving credentials to .credentials.json.
+
+These tests use a temporary credentials file and encryption key, so the
+real .credentials.json is never touched.
+"""
+
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+try:
+    from cryptography.fernet import Fernet
+    from utils import credentials
+except ImportError:
+    credentials = None
+
+
+@unittest.skipIf(credentials is None, "cryptography library not installed")
+class TestSaveCredentials(unittest.TestCase):
+    """Test merging saved accounts into an existing credentials file."""
+
+    def setUp(self):
+        """Point the credentials module at a temporary file and key."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.saved_paths = (credentials.CREDENTIALS_FILE, credentials.ENCRYPTION_KEY_FILE)
+        credentials.CREDENTIALS_FILE = os.path.join(self.tmp_dir, '.credentials.json')
+        credentials.ENCRYPTION_KEY_FILE = os.path.join(self.tmp_dir, '.encryption_key')
+        credentials.reload_encryption_key()
+
+    def tearDown(self):
+        """Restore the real credentials file and key."""
+        credentials.CREDENTIALS_FILE, credentials.ENCRYPTION_KEY_FILE = self.saved_paths
+        credentials.reload_encryption_key()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _write_legacy_file(self, accounts):
+        """Write an encrypted credentials file from before username HMACs existed."""
+        credentials._write_credentials_file({
+            'encrypted': True,
+            'accounts': [
+                {
+                    'username': credentials._encrypt_string(username),
+                    'api_token': credentials._encrypt_string(api_token)
+                }
+                for username, api_token in accounts
+            ]
+        })
+
+    def _replace_encryption_key(self):
+        """Switch to a new key, so the existing file can no longer be decrypted."""
+        with open(credentials.ENCRYPTION_KEY_FILE, 'wb') as f:
+            f.write(Fernet.generate_key())
+        credentials.reload_encryption_key()
+
+    def _read_file_bytes(self):
+        with open(credentials.CREDENTIALS_FILE, 'rb') as f:
+            return f.read()
+
+    def test_save_creates_file(self):
+        """Test saving into a missing credentials file."""
+        self.assertTrue(credentials.save_credentials('alice@example.com', 'token-1'))
+        accounts = credentials.get_all_credentials()
+        self.assertEqual(accounts, [{'username': 'alice@example.com', 'api_token': 'token-1'}])
+
+    def test_legacy_accounts_get_username_hmac(self):
+        """Test that accounts without username HMACs are matched and backfilled."""
+        self._write_legacy_file([('alice@example.com', 'old-token'), ('bob@example.com', 'bob-token')])
+
+        self.assertTrue(credentials.save_credentials('alice@example.com', 'new-token'))
+
+        data = credentials._read_credentials_file()
+        self.assertEqual(len(data['accounts']), 2)
+        self.assertEqual(
+            [account['username_hmac'] for account in data['accounts']],
+            [credentials._username_hmac('alice@example.com'), credentials._username_hmac('bob@example.com')]
+        )
+        self.assertEqual(credentials.get_all_credentials(), [
+            {'username': 'alice@example.com', 'api_token': 'new-token'},
+            {'username': 'bob@example.com', 'api_token': 'bob-token'}
+        ])
+
+    def test_undecryptable_file_is_moved_aside(self):
+        """Test that a file encrypted with another key is kept as .corrupt, and saving still works."""
+        self._write_legacy_file([('alice@example.com', 'token-1')])
+        before = self._read_file_bytes()
+        self._replace_encryption_key()
+
+        self.assertTrue(credentials.save_credentials('bob@example.com', 'token-2'))
+        self.assertEqual(credentials.get_all_credentials(), [{'username': 'bob@example.com', 'api_token': 'token-2'}])
+        with open(credentials.CREDENTIALS_FILE + '.corrupt', 'rb') as f:
+            self.assertEqual(f.read(), before)
+
+    def test_unparsable_file_is_moved_aside(self):
+        """Test that a half-written credentials file is kept as .corrupt, and saving still works."""
+        with open(credentials.CREDENTIALS_FILE, 'wb') as f:
+            f.write(b'{"encrypted": true, "accounts": [')
+
+        self.assertTrue(credentials.save_credentials('bob@example.com', 'token-2'))
+        self.assertEqual(credentials.get_all_credentials(), [{'username': 'bob@example.com', 'api_token': 'token-2'}])
+        with open(credentials.CREDENTIALS_FILE + '.corrupt', 'rb') as f:
+            self.assertEqual(f.read(), b'{"encrypted": true, "accounts": [')
+
+    def test_unreadable_file_that_cannot_be_moved(self):
+        """Test that an unreadable file is not overwritten when it cannot be moved aside."""
+        with open(credentials.CREDENTIALS_FILE, 'wb') as f:
+            f.write(b'not json')
+
+        with mock.patch.object(credentials.os, 'replace', side_effect=PermissionError(13, 'File is locked')):
+            self.assertFalse(credentials.save_credentials('bob@example.com', 'token-2'))
+        self.assertEqual(self._read_file_bytes(), b'not json')
+
+    @unittest.skipIf(os.name == 'nt', "file modes are POSIX only")
+    def test_save_keeps_file_mode(self):
+        """Test that saving keeps permissions set on the credentials file."""
+        self.assertTrue(credentials.save_credentials('alice@example.com', 'token-1'))
+        os.chmod(credentials.CREDENTIALS_FILE, 0o600)
+        self.assertTrue(credentials.save_credentials('bob@example.com', 'token-2'))
+        self.assertEqual(stat.S_IMODE(os.stat(credentials.CREDENTIALS_FILE).st_mode), 0o600)
+
+    def test_failed_write_removes_temp_file(self):
+        """Test that a failed write leaves the credentials file unchanged and no temp file."""
+        self.assertTrue(credentials.save_credentials('alice@example.com', 'token-1'))
+        before = self._read_file_bytes()
+        with mock.patch.object(credentials.os, 'replace', side_effect=OSError(13, 'Permission denied')):
+            self.assertFalse(credentials.save_credentials('bob@example.com', 'token-2'))
+        self.assertEqual(self._read_file_bytes(), before)
+        self.assertFalse(os.path.exists(credentials.CREDENTIALS_FILE + '.tmp'))
+
+
+if __name__ == '__main__':
+    unittest.main()
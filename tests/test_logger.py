@@ -0,0 +1,115 @@
+"""
+Tests for rotating log files.
+
+These tests write logs to a temporary directory.
+"""
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils import logger as log_module
+
+
+class TestLogRotation(unittest.TestCase):
+    """Test moving rotated-out logs into the backup ring."""
+
+    def setUp(self):
+        """Create a temporary log directory."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.log_file = os.path.join(self.tmp_dir, 'scraper.log')
+        self.handlers = []
+
+    def tearDown(self):
+        """Close handlers and remove the temporary log directory."""
+        log_module._ROTATE_Q.join()
+        for handler in self.handlers:
+            handler.close()
+        with log_module._rotator_lock:
+            log_module._retry_rotations[:] = [
+                item for item in log_module._retry_rotations if not item[0].startswith(self.tmp_dir)
+            ]
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def new_handler(self, max_bytes: int = 200, backup_count: int = 3):
+        handler = log_module.SafeRotatingFileHandler(
+            self.log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        self.handlers.append(handler)
+        return handler
+
+    def log(self, handler, message: str):
+        handler.emit(logging.LogRecord('test', logging.INFO, __file__, 0, message, None, None))
+
+    def files(self):
+        return sorted(os.listdir(self.tmp_dir))
+
+    def test_rollover_moves_log_into_ring(self):
+        """Test that a full log ends up in the first backup slot."""
+        handler = self.new_handler()
+        for i in range(4):
+            self.log(handler, f'record {i} ' + 'x' * 80)
+        log_module._ROTATE_Q.join()
+        self.assertEqual(self.files(), ['scraper.log', 'scraper.log.1', 'scraper.log.idx'])
+
+    def test_failed_move_is_retried_on_next_rollover(self):
+        """Test that a rotated-out log whose slot was locked is moved on the next rollover."""
+        real_replace = os.replace
+        failures = []
+
+        def replace(src, dst):
+            # The first move into a backup slot fails, as if the slot were locked
+            if '.rotating.' in src and not failures:
+                failures.append(src)
+                raise PermissionError(13, 'Backup slot is locked')
+            return real_replace(src, dst)
+
+        handler = self.new_handler()
+        with mock.patch.object(log_module.os, 'replace', side_effect=replace):
+            for i in range(4):
+                self.log(handler, f'first {i} ' + 'x' * 80)
+            log_module._ROTATE_Q.join()
+            self.assertEqual(len(failures), 1)
+            self.assertTrue(os.path.exists(failures[0]))
+
+            for i in range(4):
+                self.log(handler, f'second {i} ' + 'x' * 80)
+            log_module._ROTATE_Q.join()
+
+        self.assertEqual(
+            self.files(), ['scraper.log', 'scraper.log.1', 'scraper.log.2', 'scraper.log.idx'])
+        with open(self.log_file + '.1', encoding='utf-8') as f:
+            self.assertIn('first 0', f.read())
+        with open(self.log_file + '.2', encoding='utf-8') as f:
+            self.assertIn('second 0', f.read())
+
+    def test_leftover_rotated_files_are_swept_into_ring(self):
+        """Test that rotated-out files left by earlier processes are moved into backups."""
+        for n, age in ((0, 20), (1, 10)):
+            path = f'{self.log_file}.rotating.99999.{n}'
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(f'leftover {n}\n')
+            mtime = os.stat(path).st_mtime - age
+            os.utime(path, (mtime, mtime))
+
+        log_module._sweep_rotated_files(self.log_file, backup_count=3)
+        log_module._ROTATE_Q.join()
+
+        self.assertEqual(self.files(), ['scraper.log.1', 'scraper.log.2', 'scraper.log.idx'])
+        with open(self.log_file + '.1', encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'leftover 0\n')
+        with open(self.log_file + '.2', encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'leftover 1\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+Tests for the API request rate limiter.
+
+time.monotonic() and time.sleep() are replaced by a fake clock, so the
+tests run instantly and never depend on real timing.
+"""
+
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils import rate_limiter
+
+
+class FakeClock:
+    """Stand-in for the time module: sleeping advances the clock instantly."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds or 0.0001  # Yielding to other threads takes a moment too
+
+
+class RateLimiterTestCase(unittest.TestCase):
+    """Base class: a fake clock in place of the time module."""
+
+    def setUp(self):
+        """Replace the rate limiter's time module with a fake clock."""
+        self.clock = FakeClock()
+        patch = mock.patch.object(rate_limiter, 'time', self.clock)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def request_times(self, limiter: rate_limiter.RateLimiter, count: int) -> list:
+        """Make count requests, returning the time each one was let through."""
+        times = []
+        for _ in range(count):
+            limiter.wait_if_needed()
+            times.append(self.clock.now)
+        return times
+
+
+class TestRequestsPerMinute(RateLimiterTestCase):
+    """Test the per-minute limit."""
+
+    def test_first_minute_is_not_a_burst(self):
+        """Test that no more than requests_per_minute requests go out in the first 60 s."""
+        limiter = rate_limiter.RateLimiter(delay=0, requests_per_minute=30)
+        times = self.request_times(limiter, 100)
+        start = times[0]
+        self.assertEqual(len([t for t in times if t < start + 60]), 30)
+
+    def test_no_window_exceeds_limit(self):
+        """Test that any 60 s window holds at most requests_per_minute requests."""
+        limiter = rate_limiter.RateLimiter(delay=0, requests_per_minute=30)
+        times = self.request_times(limiter, 50)
+        self.clock.sleep(600)  # Idle long enough to refill any bucket
+        times += self.request_times(limiter, 50)
+        for start in times:
+            self.assertLessEqual(len([t for t in times if start <= t < start + 60]), 30)
+
+    def test_refill(self):
+        """Test that requests are let through at the refill rate."""
+        limiter = rate_limiter.RateLimiter(delay=0, requests_per_minute=60)
+        times = self.request_times(limiter, 5)
+        self.assertEqual([round(t - times[0], 3) for t in times], [0, 1, 2, 3, 4])
+
+        # After idling, the next request goes out at once, then the pace resumes
+        self.clock.sleep(30)
+        idle_end = self.clock.now
+        times = self.request_times(limiter, 3)
+        self.assertEqual([round(t - idle_end, 3) for t in times], [0, 1, 2])
+
+    def test_delay_is_kept_with_limit(self):
+        """Test that the minimum delay still applies when it is longer than the refill interval."""
+        limiter = rate_limiter.RateLimiter(delay=2, requests_per_minute=60)
+        times = self.request_times(limiter, 3)
+        self.assertEqual([round(t - times[0], 3) for t in times], [0, 2, 4])
+
+
+class TestConcurrentRequests(RateLimiterTestCase):
+    """Test reserving request slots from several threads."""
+
+    def test_threads_get_distinct_slots(self):
+        """Test that concurrent callers are spaced out instead of sharing a slot."""
+        # Time stands still; record the waits instead of sleeping
+        waits = []
+        limiter = rate_limiter.RateLimiter(delay=0.5)
+        with mock.patch.object(rate_limiter, '_precise_sleep', waits.append):
+            threads = [threading.Thread(target=limiter.wait_if_needed) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        # The first caller goes at once; the others wait for their own slot
+        self.assertEqual(sorted(round(wait, 6) for wait in waits), [0.5 * i for i in range(1, 10)])
+
+
+class TestPreciseSleep(RateLimiterTestCase):
+    """Test sleeping without oversleeping short waits."""
+
+    def test_short_wait_is_spun(self):
+        """Test that a wait of a few milliseconds yields instead of sleeping a timer tick."""
+        start = self.clock.now
+        rate_limiter._precise_sleep(0.003)
+        self.assertGreaterEqual(self.clock.now, start + 0.003)
+        self.assertTrue(self.clock.sleeps)
+        self.assertEqual(set(self.clock.sleeps), {0})
+
+    def test_long_wait_sleeps_then_spins(self):
+        """Test that a longer wait sleeps most of the time and spins the last 2 ms."""
+        start = self.clock.now
+        rate_limiter._precise_sleep(0.1)
+        self.assertGreaterEqual(self.clock.now, start + 0.1)
+        self.assertAlmostEqual(self.clock.sleeps[0], 0.098)
+        self.assertEqual(set(self.clock.sleeps[1:]), {0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+"""
+Tests for reading and updating settings in the .env file.
+
+These tests use a temporary .env file, so the real one is never touched.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils import settings_manager
+
+
+class EnvFileTestCase(unittest.TestCase):
+    """Base class: a temporary .env file."""
+
+    def setUp(self):
+        """Point the settings manager at a temporary .env file."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.env_path = os.path.join(self.tmp_dir, '.env')
+        patch = mock.patch.object(settings_manager, 'get_env_file_path', lambda: self.env_path)
+        patch.start()
+        self.addCleanup(patch.stop)
+        settings_manager._ENV_CACHE['stamp'] = None
+
+    def tearDown(self):
+        """Remove the temporary .env file."""
+        settings_manager._ENV_CACHE['stamp'] = None
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def write_env(self, text: str):
+        with open(self.env_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+
+    def read_env(self) -> str:
+        with open(self.env_path, 'r', encoding='utf-8', newline='') as f:
+            return f.read()
+
+
+def parse_like_before(text: str) -> dict:
+    """Parse .env text with the line-by-line loop read_env_settings used before its regex."""
+    settings = {}
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if '=' in line:
+            key, value = line.split('=', 1)
+            settings[key.strip()] = value.strip().strip('"').strip("'")
+    return settings
+
+
+class TestReadEnvSettings(EnvFileTestCase):
+    """Test parsing .env, checked against the previous line-by-line parser."""
+
+    cases = [
+        ('double quotes', 'A="quoted value"\n', {'A': 'quoted value'}),
+        ('single quotes', "A='quoted value'\n", {'A': 'quoted value'}),
+        ('quotes inside', 'A=say "hi"\nB=it\'s\n', {'A': 'say "hi', 'B': 'it\'s'}),
+        ('spaces around =', 'A = 1\n  B\t=\t2  \n', {'A': '1', 'B': '2'}),
+        ('export prefix', 'export A=1\n', {'export A': '1'}),
+        ('comments', '# A=1\n  # B=2\nC=3 # not a comment\n', {'C': '3 # not a comment'}),
+        ('blank lines', '\n\nA=1\n   \n\t\nB=2', {'A': '1', 'B': '2'}),
+        ('no value', 'A=\nB=  \nC=""\n', {'A': '', 'B': '', 'C': ''}),
+        ('no =', 'A\nB=1\n', {'B': '1'}),
+        ('= in value', 'URL=http://x/?a=1&b=2\n', {'URL': 'http://x/?a=1&b=2'}),
+        ('later key wins', 'A=1\nA=2\n', {'A': '2'}),
+        ('other whitespace', 'A=1\x0c\n\xa0B\xa0=\xa02\n\xa0# C=3\n', {'A': '1', 'B': '2'}),
+        ('CRLF line endings', 'A=1\r\n# B=2\r\nC="3"\r\n', {'A': '1', 'C': '3'}),
+    ]
+
+    def test_cases(self):
+        """Test each case against the expected settings and the previous parser."""
+        for name, text, expected in self.cases:
+            with self.subTest(name):
+                self.write_env(text)
+                settings_manager._ENV_CACHE['stamp'] = None
+                settings = settings_manager.read_env_settings()
+                self.assertEqual(settings, expected)
+                # .env is read in text mode, so \r\n arrives as \n
+                self.assertEqual(settings, parse_like_before(text.replace('\r\n', '\n')))
+
+
+class TestEnvCache(EnvFileTestCase):
+    """Test reusing the parsed .env until the file changes."""
+
+    def keep_mtime(self, st: os.stat_result):
+        """Set .env's mtime back, so only other changes can be noticed."""
+        os.utime(self.env_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    def test_cache_is_used(self):
+        """Test that an unchanged .env is not read again."""
+        self.write_env('A=1\n')
+        self.assertEqual(settings_manager.read_env_settings(), {'A': '1'})
+        with mock.patch('builtins.open', side_effect=AssertionError(".env read again")):
+            self.assertEqual(settings_manager.read_env_settings(), {'A': '1'})
+
+    def test_update_invalidates_cache(self):
+        """Test that values written by update_env_settings are read back, even with the same size and mtime."""
+        self.write_env('LOG_LEVEL=INFO\n')
+        st = os.stat(self.env_path)
+        self.assertEqual(settings_manager.read_env_settings(), {'LOG_LEVEL': 'INFO'})
+
+        self.assertEqual(settings_manager.update_env_settings({'LOG_LEVEL': 'WARN'}), {'LOG_LEVEL': True})
+        self.keep_mtime(st)
+        self.assertEqual(settings_manager.read_env_settings(), {'LOG_LEVEL': 'WARN'})
+
+    def test_outside_edit_changing_size(self):
+        """Test that an edit made outside the app is noticed when it changes the size."""
+        self.write_env('LOG_LEVEL=INFO\n')
+        st = os.stat(self.env_path)
+        self.assertEqual(settings_manager.read_env_settings(), {'LOG_LEVEL': 'INFO'})
+
+        with open(self.env_path, 'r+', encoding='utf-8') as f:
+            f.write('LOG_LEVEL=DEBUG\n')
+        self.keep_mtime(st)
+        self.assertEqual(settings_manager.read_env_settings(), {'LOG_LEVEL': 'DEBUG'})
+
+    def test_outside_edit_changing_mtime(self):
+        """Test that a same-size edit made outside the app is noticed when the mtime changes."""
+        self.write_env('LOG_LEVEL=INFO\n')
+        st = os.stat(self.env_path)
+        self.assertEqual(settings_manager.read_env_settings(), {'LOG_LEVEL': 'INFO'})
+
+        with open(self.env_path, 'r+', encoding='utf-8') as f:
+            f.write('LOG_LEVEL=WARN\n')
+        os.utime(self.env_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        self.assertEqual(settings_manager.read_env_settings(), {'LOG_LEVEL': 'WARN'})
+
+
+class TestUpdateEnvSetting(EnvFileTestCase):
+    """Test that updates are written before the call returns."""
+
+    def test_update_is_written_immediately(self):
+        """Test that a single-key update is in .env when the call returns."""
+        self.write_env('# Settings\nLOG_LEVEL=INFO\n')
+        self.assertTrue(settings_manager.update_env_setting('LOG_LEVEL', 'DEBUG'))
+        self.assertEqual(self.read_env(), '# Settings\nLOG_LEVEL=DEBUG\n')
+        self.assertEqual(settings_manager.read_env_settings(), {'LOG_LEVEL': 'DEBUG'})
+
+    def test_failed_write_is_reported(self):
+        """Test that a failed rewrite returns False and leaves .env unchanged."""
+        self.write_env('LOG_LEVEL=INFO\n')
+        with mock.patch.object(settings_manager.os, 'replace', side_effect=OSError(13, 'Permission denied')):
+            self.assertFalse(settings_manager.update_env_setting('LOG_LEVEL', 'DEBUG'))
+            self.assertEqual(settings_manager.update_env_settings({'A': '1', 'B': '2'}), {'A': False, 'B': False})
+        self.assertEqual(self.read_env(), 'LOG_LEVEL=INFO\n')
+        self.assertEqual([name for name in os.listdir(self.tmp_dir) if name != '.env'], [])
+
+    def test_missing_env_file(self):
+        """Test that updates fail when .env does not exist."""
+        self.assertFalse(settings_manager.update_env_setting('LOG_LEVEL', 'DEBUG'))
+        self.assertFalse(os.path.exists(self.env_path))
+
+    def test_concurrent_updates_keep_all_keys(self):
+        """Test that updates from several threads do not drop each other's keys."""
+        self.write_env('LOG_LEVEL=INFO\n')
+        threads = [
+            threading.Thread(target=settings_manager.update_env_setting, args=(f'KEY_{i}', str(i)))
+            for i in range(20)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        settings = settings_manager.read_env_settings()
+        self.assertEqual(settings.pop('LOG_LEVEL'), 'INFO')
+        self.assertEqual(settings, {f'KEY_{i}': str(i) for i in range(20)})
+
+
+class TestEnvFileFormat(EnvFileTestCase):
+    """Test that rewriting .env keeps its layout."""
+
+    def test_rewritten_last_line_without_newline(self):
+        """Test that no blank line is added when the unterminated last line is rewritten."""
+        self.write_env('LOG_LEVEL=INFO\nSECRET_KEY=old')
+        for i in range(3):
+            results = settings_manager.update_env_settings({'SECRET_KEY': f'new{i}', f'NEW_KEY_{i}': 'x'})
+            self.assertTrue(all(results.values()))
+        self.assertEqual(
+            self.read_env(),
+            'LOG_LEVEL=INFO\nSECRET_KEY=new2\nNEW_KEY_0=x\nNEW_KEY_1=x\nNEW_KEY_2=x\n'
+        )
+
+    def test_unterminated_last_line_is_kept(self):
+        """Test that keys are appended on their own line after an unterminated last line."""
+        self.write_env('# Settings\nLOG_LEVEL=INFO')
+        self.assertTrue(settings_manager.update_env_setting('DEBUG', 'false'))
+        self.assertEqual(self.read_env(), '# Settings\nLOG_LEVEL=INFO\nDEBUG=false\n')
+
+    def test_comments_and_blank_lines_are_kept(self):
+        """Test that only the updated lines change."""
+        self.write_env('# Logging\nLOG_LEVEL=INFO\n\n# LOG_LEVEL=DEBUG\nOTHER=1\n')
+        self.assertTrue(settings_manager.update_env_setting('LOG_LEVEL', 'WARNING'))
+        self.assertEqual(self.read_env(), '# Logging\nLOG_LEVEL=WARNING\n\n# LOG_LEVEL=DEBUG\nOTHER=1\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,368 @@
+"""
+Tests for the task manager that runs scraper scripts for the web interface.
+
+Task status files are written to a temporary directory, and the scraper
+scripts are replaced by small stand-ins, so the tests run in seconds and
+never touch real data.
+"""
+
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils import task_manager
+
+
+class TaskManagerTestCase(unittest.TestCase):
+    """Base class: task status files and task scripts in a temporary directory."""
+
+    # Stand-in scripts, by name
+    scripts = {}
+
+    def setUp(self):
+        """Point the task manager at temporary files and scripts."""
+        self.tmp_dir = tempfile.mkdtemp()
+        patches = [
+            mock.patch.object(task_manager, 'TASK_STATUS_FILE', os.path.join(self.tmp_dir, 'task_status.json')),
+            mock.patch.object(task_manager, 'TASK_EVENTS_FILE', os.path.join(self.tmp_dir, 'task_events.jsonl')),
+            mock.patch.object(task_manager, '_script_path', lambda name: os.path.join(self.tmp_dir, name)),
+            mock.patch.object(task_manager, 'print', lambda *args, **kwargs: None, create=True),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        for name, source in self.scripts.items():
+            with open(os.path.join(self.tmp_dir, name), 'w', encoding='utf-8') as f:
+                f.write(textwrap.dedent(source))
+        self.managers = []
+
+    def tearDown(self):
+        """Flush and forget the task managers created by the test."""
+        for manager in self.managers:
+            manager.flush()
+            atexit.unregister(manager.flush)
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def new_manager(self) -> task_manager.TaskManager:
+        """Create a task manager, as the web app does at startup."""
+        manager = task_manager.TaskManager()
+        self.managers.append(manager)
+        return manager
+
+    def wait_until(self, condition, timeout: float = 10):
+        """Wait for condition() to become true."""
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("Timed out waiting for condition")
+            time.sleep(0.02)
+
+
+@unittest.skipIf(os.name == 'nt', "stand-in scripts use POSIX signals")
+class TestCancelPipeline(TaskManagerTestCase):
+    """Test cancelling a running full pipeline."""
+
+    scripts = {
+        # Takes a second to shut down after SIGTERM
+        'run_scraper.py': '''
+            import signal, sys, time
+            def stop(*args):
+                time.sleep(1)
+                sys.exit(1)
+            signal.signal(signal.SIGTERM, stop)
+            print('Scraping apps', flush=True)
+            time.sleep(30)
+        ''',
+    }
+
+    def test_pipeline_lock_released_while_step_stops(self):
+        """Test that the pipeline task can be updated while its step shuts down."""
+        manager = self.new_manager()
+        pipeline_id = manager.start_full_pipeline()
+        self.wait_until(lambda: (manager.get_task_status(pipeline_id) or {}).get('current_task_id'))
+        step_id = manager.get_task_status(pipeline_id)['current_task_id']
+        # Printed once the script handles SIGTERM
+        self.wait_until(lambda: manager.get_task_status(step_id).get('current_action') == 'Scraping apps')
+
+        cancel = threading.Thread(target=manager.cancel_task, args=(pipeline_id,))
+        cancel.start()
+        self.wait_until(lambda: manager.get_task_status(pipeline_id)['status'] == 'cancelled')
+
+        lock = manager._task_lock(pipeline_id)
+        acquired = lock.acquire(timeout=0.5)
+        if acquired:
+            lock.release()
+        cancel.join()
+
+        self.assertTrue(acquired, "pipeline lock held while its step was stopping")
+        self.assertEqual(manager.get_task_status(step_id)['status'], 'cancelled')
+        status = manager._wait_for_task(step_id)
+        self.assertEqual(status['status'], 'cancelled')
+
+
+
+class TestStopTask(TaskManagerTestCase):
+    """Test how cancel_task signals task processes."""
+
+    def test_ctrl_break_failure_falls_back_to_terminate(self):
+        """Test that a task is terminated when CTRL_BREAK cannot be sent (no shared console)."""
+        process = mock.Mock(pid=4321)
+        with mock.patch.object(task_manager.os, 'name', 'nt'), \
+                mock.patch.object(task_manager.signal, 'CTRL_BREAK_EVENT', 1, create=True), \
+                mock.patch.object(task_manager.os, 'kill', side_effect=OSError(6, 'The handle is invalid')) as kill:
+            task_manager._stop_process_group(process)
+        kill.assert_called_once_with(4321, 1)
+        process.terminate.assert_called_once_with()
+
+    def test_ctrl_break_stops_process_group(self):
+        """Test that CTRL_BREAK is used when it can be sent."""
+        process = mock.Mock(pid=4321)
+        with mock.patch.object(task_manager.os, 'name', 'nt'), \
+                mock.patch.object(task_manager.signal, 'CTRL_BREAK_EVENT', 1, create=True), \
+                mock.patch.object(task_manager.os, 'kill') as kill:
+            task_manager._stop_process_group(process)
+        kill.assert_called_once_with(4321, 1)
+        process.terminate.assert_not_called()
+
+    @unittest.skipIf(os.name == 'nt', "process groups are POSIX only")
+    def test_reaped_process_is_not_signalled(self):
+        """Test that a reaped task's PID (which may be reused) is not signalled."""
+        process = mock.Mock(pid=4321, returncode=0)
+        with mock.patch.object(task_manager.os, 'killpg') as killpg:
+            with self.assertRaises(ProcessLookupError):
+                task_manager._stop_process_group(process)
+        killpg.assert_not_called()
+
+    def test_stale_pid_signals_single_process(self):
+        """Test that a PID read from the status file is signalled alone, never as a group."""
+        manager = self.new_manager()
+        manager._put_task('download_20260101_000000', {'status': 'running', 'pid': 4321})
+        with mock.patch.object(task_manager.os, 'kill') as kill, \
+                mock.patch.object(task_manager.os, 'killpg', create=True) as killpg:
+            self.assertTrue(manager.cancel_task('download_20260101_000000'))
+        kill.assert_called_once_with(4321, task_manager.signal.SIGTERM)
+        killpg.assert_not_called()
+        self.assertEqual(manager.get_task_status('download_20260101_000000')['status'], 'cancelled')
+
+
+
+class TestLoadStatus(TaskManagerTestCase):
+    """Test loading task status when the task manager starts."""
+
+    def write_status_file(self, data: bytes):
+        with open(task_manager.TASK_STATUS_FILE, 'wb') as f:
+            f.write(data)
+
+    def test_unreadable_status_file_is_moved_aside(self):
+        """Test that an unreadable status file is kept as .corrupt, not overwritten."""
+        self.write_status_file(b'{"scrape_apps_20260101_000000": {"status": "runn')
+        manager = self.new_manager()
+        self.assertEqual(manager.tasks, {})
+        with open(task_manager.TASK_STATUS_FILE + '.corrupt', 'rb') as f:
+            self.assertEqual(f.read(), b'{"scrape_apps_20260101_000000": {"status": "runn')
+
+    def test_unreadable_status_file_that_cannot_be_moved(self):
+        """Test that the task manager still starts when the unreadable file cannot be moved."""
+        self.write_status_file(b'not json')
+        with mock.patch.object(task_manager.os, 'replace', side_effect=PermissionError(13, 'File is locked')):
+            manager = self.new_manager()
+        self.assertEqual(manager.tasks, {})
+        self.assertIsNone(manager.get_latest_task('scrape_apps'))
+
+
+
+class TestRemovedTasks(TaskManagerTestCase):
+    """Test that removed tasks stay removed."""
+
+    task_id = 'download_20260101_000000'
+
+    def test_update_does_not_recreate_removed_task(self):
+        """Test that a late update (e.g. a runner finishing after a clear) is dropped."""
+        manager = self.new_manager()
+        manager._put_task(self.task_id, {'status': 'running', 'script': 'download_binaries.py'})
+        manager._remove_tasks([self.task_id])
+
+        manager._update_task(self.task_id, status='completed', finished_at=datetime.now().isoformat())
+        self.assertIsNone(manager.get_task_status(self.task_id))
+        manager.flush()
+        self.assertIsNone(self.new_manager().get_task_status(self.task_id))
+
+
+    def test_removal_is_journaled(self):
+        """Test that a removal is restored from the journal when no snapshot followed it."""
+        manager = self.new_manager()
+        manager._put_task(self.task_id, {'status': 'completed', 'finished_at': datetime.now().isoformat()})
+        manager._put_task('scrape_apps_20260101_000000', {'status': 'running'})
+        manager.flush()
+
+        manager.clear_completed_tasks()
+        with manager._journal_lock:
+            manager._event_log.flush()
+        self.assertNotIn(self.task_id, manager._task_locks)
+
+        restarted = self.new_manager()
+        self.assertIsNone(restarted.get_task_status(self.task_id))
+        self.assertEqual(restarted.get_task_status('scrape_apps_20260101_000000'), {'status': 'running'})
+
+
+
+class TestEvictOld(TaskManagerTestCase):
+    """Test forgetting old finished tasks when another task finishes."""
+
+    def test_tasks_without_finished_at(self):
+        """Test that finished tasks lacking finished_at are aged by started_at, or kept."""
+        now = datetime.now()
+        long_ago = (now - timedelta(seconds=task_manager.TASK_MAX_AGE + 3600)).isoformat()
+        manager = self.new_manager()
+        manager._put_task('download_20260101_000000', {'status': 'completed'})
+        manager._put_task('download_20260102_000000', {'status': 'cancelled', 'started_at': now.isoformat()})
+        manager._put_task('download_20260103_000000', {'status': 'failed', 'started_at': long_ago})
+        manager._put_task('download_20260104_000000', {'status': 'completed', 'finished_at': long_ago})
+        manager._put_task('scrape_apps_20260105_000000', {'status': 'running'})
+
+        manager._update_task('scrape_apps_20260105_000000', status='completed', finished_at=now.isoformat())
+        self.assertEqual(sorted(manager.tasks), [
+            'download_20260101_000000',
+            'download_20260102_000000',
+            'scrape_apps_20260105_000000',
+        ])
+
+
+
+class TestStatusJournal(TaskManagerTestCase):
+    """Test restoring task status from the status file and the journal of later changes."""
+
+    task_id = 'download_20260101_000000'
+
+    def write_lines(self, path: str, lines):
+        with open(path, 'wb') as f:
+            for line in lines:
+                f.write(line if isinstance(line, bytes) else json.dumps(line).encode() + b'\n')
+
+    def test_replay_order(self):
+        """Test that the status file, then the .old journal, then the journal are applied."""
+        with open(task_manager.TASK_STATUS_FILE, 'w', encoding='utf-8') as f:
+            json.dump({self.task_id: {'status': 'running', 'progress': 10, 'message': 'snapshot'}}, f)
+        self.write_lines(task_manager.TASK_EVENTS_FILE + '.old', [
+            {'id': self.task_id, 'patch': {'progress': 20, 'message': 'old journal'}},
+            {'id': 'scrape_apps_20260101_000000', 'task': {'status': 'running'}},
+        ])
+        self.write_lines(task_manager.TASK_EVENTS_FILE, [
+            {'id': self.task_id, 'patch': {'progress': 30}},
+            {'id': 'scrape_apps_20260101_000000', 'patch': {'status': 'completed'}},
+        ])
+
+        manager = self.new_manager()
+        self.assertEqual(manager.get_task_status(self.task_id),
+                         {'status': 'running', 'progress': 30, 'message': 'old journal'})
+        self.assertEqual(manager.get_task_status('scrape_apps_20260101_000000'), {'status': 'completed'})
+        # Loading compacts everything into the status file
+        self.assertFalse(os.path.exists(task_manager.TASK_EVENTS_FILE + '.old'))
+        self.assertEqual(os.path.getsize(task_manager.TASK_EVENTS_FILE), 0)
+
+    def test_patch_for_unknown_task_is_skipped(self):
+        """Test that a journaled change to a task not in the status file does not create it."""
+        self.write_lines(task_manager.TASK_EVENTS_FILE, [
+            {'id': self.task_id, 'patch': {'status': 'completed', 'progress': 100}},
+        ])
+        self.assertIsNone(self.new_manager().get_task_status(self.task_id))
+
+
+    def test_torn_last_line(self):
+        """Test that a journal line cut short by a crash is skipped, and later changes are kept."""
+        self.write_lines(task_manager.TASK_EVENTS_FILE, [
+            {'id': self.task_id, 'task': {'status': 'running', 'progress': 10}},
+            b'{"id": "download_20260101_000000", "patch": {"progr',
+        ])
+        manager = self.new_manager()
+        self.assertEqual(manager.get_task_status(self.task_id), {'status': 'running', 'progress': 10})
+
+        manager._update_task(self.task_id, progress=40)
+        with manager._journal_lock:
+            manager._event_log.flush()
+        self.assertEqual(self.new_manager().get_task_status(self.task_id)['progress'], 40)
+
+    def test_journal_with_only_a_torn_line(self):
+        """Test that changes journaled after a lone torn line are not merged into it."""
+        self.write_lines(task_manager.TASK_EVENTS_FILE, [b'{"id": "download_20260101_000000", "ta'])
+        manager = self.new_manager()
+        self.assertEqual(manager.tasks, {})
+
+        manager._put_task(self.task_id, {'status': 'running'})
+        with manager._journal_lock:
+            manager._event_log.flush()
+        self.assertEqual(self.new_manager().get_task_status(self.task_id), {'status': 'running'})
+
+    def test_crash_between_rotation_and_snapshot(self):
+        """Test that changes moved to the .old journal are restored when no snapshot followed."""
+        manager = self.new_manager()
+        manager._put_task(self.task_id, {'status': 'running', 'progress': 0})
+        manager.flush()
+        manager._update_task(self.task_id, progress=50)
+        with manager._journal_lock:
+            # The snapshot would be written next; the process dies instead
+            manager._rotate_journal()
+        manager._update_task(self.task_id, progress=70, message='after rotation')
+        with manager._journal_lock:
+            manager._event_log.flush()
+
+        self.assertEqual(self.new_manager().get_task_status(self.task_id),
+                         {'status': 'running', 'progress': 70, 'message': 'after rotation'})
+
+    def test_failed_snapshots_keep_changes(self):
+        """Test that changes survive several failed status file writes."""
+        manager = self.new_manager()
+        manager._put_task(self.task_id, {'status': 'running', 'progress': 0})
+        real_replace = os.replace
+
+        def replace(src, dst):
+            if dst == task_manager.TASK_STATUS_FILE:
+                raise PermissionError(13, 'Status file is locked')
+            return real_replace(src, dst)
+
+        with mock.patch.object(task_manager.os, 'replace', side_effect=replace):
+            manager.flush()
+            manager._update_task(self.task_id, progress=30)
+            manager.flush()
+            manager._update_task(self.task_id, progress=60)
+            with manager._journal_lock:
+                manager._event_log.flush()
+
+            self.assertTrue(os.path.exists(task_manager.TASK_EVENTS_FILE + '.old'))
+            self.assertFalse(os.path.exists(task_manager.TASK_STATUS_FILE))
+            restarted = self.new_manager()
+
+        self.assertEqual(restarted.get_task_status(self.task_id), {'status': 'running', 'progress': 60})
+
+
+    def test_torn_line_in_old_journal(self):
+        """Test that changes appended to the .old journal after a torn line are kept."""
+        self.write_lines(task_manager.TASK_EVENTS_FILE + '.old', [
+            {'id': self.task_id, 'task': {'status': 'running', 'progress': 10}},
+            b'{"id": "download_20260101_000000", "patch": {"progr',
+        ])
+        self.write_lines(task_manager.TASK_EVENTS_FILE, [{'id': self.task_id, 'patch': {'progress': 20}}])
+        # The snapshot after loading fails, so the journal is appended to the .old journal
+        with mock.patch.object(task_manager.os, 'replace', side_effect=PermissionError(13, 'Status file is locked')):
+            self.new_manager()
+        self.assertFalse(os.path.exists(task_manager.TASK_STATUS_FILE))
+
+        self.assertEqual(self.new_manager().get_task_status(self.task_id), {'status': 'running', 'progress': 20})
+
+
+if __name__ == '__main__':
+    unittest.main()
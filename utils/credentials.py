@@ -3,9 +3,19 @@
 import os
 import json
 import base64
+import hashlib
+import hmac
+import itertools
 import random
+import stat
 import threading
-from typing import Optional, Dict, List
+from types import MappingProxyType
+from typing import Optional, Dict, List, Mapping, Tuple
+
+try:
+    import orjson
+except ImportError:  # Optional speedup, fall back to the standard library
+    orjson = None
 
 # Lazy logger initialization to avoid circular import with config.settings -> credentials -> logger -> settings
 _logger = None
@@ -19,10 +29,19 @@ def _get_logger():
         _logger = get_logger('credentials')
     return _logger
 
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # Credentials file (not in git)
-CREDENTIALS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.credentials.json')
+CREDENTIALS_FILE = os.path.join(_BASE_DIR, '.credentials.json')
 # Encryption key file (machine-specific, not in git)
-ENCRYPTION_KEY_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.encryption_key')
+ENCRYPTION_KEY_FILE = os.path.join(_BASE_DIR, '.encryption_key')
+
+# Serializes read-modify-write cycles on the credentials file
+_file_lock = threading.Lock()
+
+
+# Encryption key cached after the first read so the key file is opened once per process
+_KEY_BYTES: Optional[bytes] = None
+_key_lock = threading.Lock()
 
 
 def _get_or_create_encryption_key() -> bytes:
@@ -31,6 +50,8 @@ def _get_or_create_encryption_key() -> bytes:
 
     The key is stored in a file and is machine-specific.
     This provides strong encryption to prevent plain-text credential storage.
+    The key is read from disk once and cached; call reload_encryption_key()
+    to pick up a key file that was replaced while the process is running.
 
     Returns:
         Encryption key as bytes
@@ -38,6 +59,11 @@ def _get_or_create_encryption_key() -> bytes:
     Raises:
         ImportError: If cryptography library is not installed
     """
+    global _KEY_BYTES
+    key = _KEY_BYTES
+    if key is not None:
+        return key
+
     try:
         from cryptography.fernet import Fernet
     except ImportError:
@@ -46,17 +72,27 @@ def _get_or_create_encryption_key() -> bytes:
             "Install it with: pip install cryptography"
         )
 
-    if os.path.exists(ENCRYPTION_KEY_FILE):
-        # Load existing key
-        with open(ENCRYPTION_KEY_FILE, 'rb') as f:
-            return f.read()
-    else:
-        # Generate new key
-        key = Fernet.generate_key()
-        with open(ENCRYPTION_KEY_FILE, 'wb') as f:
-            f.write(key)
-        _get_logger().info("Generated new encryption key for credentials")
-        return key
+    with _key_lock:
+        if _KEY_BYTES is None:
+            if os.path.exists(ENCRYPTION_KEY_FILE):
+                # Load existing key
+                with open(ENCRYPTION_KEY_FILE, 'rb') as f:
+                    _KEY_BYTES = f.read()
+            else:
+                # Generate new key
+                key = Fernet.generate_key()
+                with open(ENCRYPTION_KEY_FILE, 'wb') as f:
+                    f.write(key)
+                _get_logger().info("Generated new encryption key for credentials")
+                _KEY_BYTES = key
+        return _KEY_BYTES
+
+
+def reload_encryption_key() -> None:
+    """Drop the cached encryption key so the next use re-reads the key file."""
+    global _KEY_BYTES
+    with _key_lock:
+        _KEY_BYTES = None
 
 
 def _encrypt_string(plaintext: str) -> str:
@@ -102,6 +138,114 @@ def _decrypt_string(encrypted: str) -> str:
     return decrypted.decode()
 
 
+if orjson is not None:
+    def _json_loads(data: bytes):
+        return orjson.loads(data)
+
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+else:
+    def _json_loads(data: bytes):
+        return json.loads(data)
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, indent=2).encode('utf-8')
+
+
+def _read_credentials_file() -> dict:
+    """
+    Read and parse .credentials.json.
+
+    Opens the file directly instead of checking for it first, so a missing
+    file costs a single failed open() rather than a stat() plus an open().
+
+    Returns:
+        Parsed JSON data
+
+    Raises:
+        FileNotFoundError: If the credentials file does not exist
+    """
+    with open(CREDENTIALS_FILE, 'rb') as f:
+        return _json_loads(f.read())
+
+
+def _write_credentials_file(credentials: dict) -> None:
+    """
+    Atomically write .credentials.json.
+
+    The data is written to a temporary file, flushed to disk and then moved
+    over the real file, so a crash mid-write never leaves a truncated file.
+    The real file's permissions are kept.
+
+    Args:
+        credentials: Data to serialize
+    """
+    tmp_path = CREDENTIALS_FILE + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_json_dumps(credentials))
+            f.flush()
+            os.fsync(f.fileno())
+        # Keep the permissions of the existing file (e.g. chmod 600)
+        try:
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(CREDENTIALS_FILE).st_mode))
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, CREDENTIALS_FILE)
+    except Exception:
+        # Don't leave encrypted data behind in a stray temp file
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _read_file_accounts() -> List[Dict[str, str]]:
+    """
+    Read all accounts stored in .credentials.json, decrypting them if needed.
+
+    Returns:
+        List of dictionaries with credentials (username, api_token)
+
+    Raises:
+        FileNotFoundError: If the credentials file does not exist
+    """
+    accounts = []
+    data = _read_credentials_file()
+
+    # Check if encrypted format
+    is_encrypted = data.get('encrypted', False)
+
+    # Check if it's the new format with multiple accounts
+    if isinstance(data, dict) and 'accounts' in data:
+        account_list = data.get('accounts', [])
+        if is_encrypted:
+            # Decrypt all accounts
+            for account in account_list:
+                accounts.append({
+                    'username': _decrypt_string(account.get('username', '')) if account.get('username') else '',
+                    'api_token': _decrypt_string(account.get('api_token', '')) if account.get('api_token') else ''
+                })
+        else:
+            accounts = account_list
+
+    # Old format - single credentials, convert to list
+    elif isinstance(data, dict) and 'username' in data and data.get('username'):
+        if is_encrypted:
+            accounts = [{
+                'username': _decrypt_string(data.get('username', '')) if data.get('username') else '',
+                'api_token': _decrypt_string(data.get('api_token', '')) if data.get('api_token') else ''
+            }]
+        else:
+            accounts = [{
+                'username': data.get('username', ''),
+                'api_token': data.get('api_token', '')
+            }]
+
+    return accounts
+
+
 def get_credentials() -> Dict[str, str]:
     """
     Get credentials from .credentials.json file with fallback to .env.
@@ -119,46 +263,46 @@ def get_credentials() -> Dict[str, str]:
     credentials = {'username': '', 'api_token': ''}
 
     # Try loading from .credentials.json first
-    if os.path.exists(CREDENTIALS_FILE):
-        try:
-            with open(CREDENTIALS_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-                # Check if encrypted format
-                is_encrypted = data.get('encrypted', False)
-
-                # Check if it's the new format with multiple accounts
-                if isinstance(data, dict) and 'accounts' in data:
-                    # Return first account for backward compatibility
-                    accounts = data.get('accounts', [])
-                    if accounts:
-                        account = accounts[0]
-                        if is_encrypted:
-                            credentials = {
-                                'username': _decrypt_string(account.get('username', '')) if account.get('username') else '',
-                                'api_token': _decrypt_string(account.get('api_token', '')) if account.get('api_token') else ''
-                            }
-                        else:
-                            credentials = {
-                                'username': account.get('username', ''),
-                                'api_token': account.get('api_token', '')
-                            }
-
-                # Old format - single credentials
-                elif is_encrypted:
-                    _get_logger().info("Credentials are encrypted - decrypting")
+    try:
+        data = _read_credentials_file()
+
+        # Check if encrypted format
+        is_encrypted = data.get('encrypted', False)
+
+        # Check if it's the new format with multiple accounts
+        if isinstance(data, dict) and 'accounts' in data:
+            # Return first account for backward compatibility
+            accounts = data.get('accounts', [])
+            if accounts:
+                account = accounts[0]
+                if is_encrypted:
                     credentials = {
-                        'username': _decrypt_string(data.get('username', '')) if data.get('username') else '',
-                        'api_token': _decrypt_string(data.get('api_token', '')) if data.get('api_token') else ''
+                        'username': _decrypt_string(account.get('username', '')) if account.get('username') else '',
+                        'api_token': _decrypt_string(account.get('api_token', '')) if account.get('api_token') else ''
                     }
                 else:
-                    _get_logger().warning("Credentials are stored in plain text - will be encrypted on next save")
                     credentials = {
-                        'username': data.get('username', ''),
-                        'api_token': data.get('api_token', '')
+                        'username': account.get('username', ''),
+                        'api_token': account.get('api_token', '')
                     }
-        except Exception as e:
-            _get_logger().error(f"Error reading credentials file: {str(e)}")
+
+        # Old format - single credentials
+        elif is_encrypted:
+            _get_logger().info("Credentials are encrypted - decrypting")
+            credentials = {
+                'username': _decrypt_string(data.get('username', '')) if data.get('username') else '',
+                'api_token': _decrypt_string(data.get('api_token', '')) if data.get('api_token') else ''
+            }
+        else:
+            _get_logger().warning("Credentials are stored in plain text - will be encrypted on next save")
+            credentials = {
+                'username': data.get('username', ''),
+                'api_token': data.get('api_token', '')
+            }
+    except FileNotFoundError:
+        pass  # No credentials file yet, fall back to .env
+    except Exception as e:
+        _get_logger().error("Error reading credentials file: %s", e)
 
     # Fallback to .env if credentials are empty
     if not credentials.get('username') or not credentials.get('api_token'):
@@ -175,7 +319,7 @@ def get_credentials() -> Dict[str, str]:
                     'api_token': env_token
                 }
         except Exception as e:
-            _get_logger().error(f"Error reading credentials from .env: {str(e)}")
+            _get_logger().error("Error reading credentials from .env: %s", e)
 
     return credentials
 
@@ -195,41 +339,12 @@ def get_all_credentials() -> List[Dict[str, str]]:
     accounts = []
 
     # Try loading from .credentials.json first
-    if os.path.exists(CREDENTIALS_FILE):
-        try:
-            with open(CREDENTIALS_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-                # Check if encrypted format
-                is_encrypted = data.get('encrypted', False)
-
-                # Check if it's the new format with multiple accounts
-                if isinstance(data, dict) and 'accounts' in data:
-                    account_list = data.get('accounts', [])
-                    if is_encrypted:
-                        # Decrypt all accounts
-                        for account in account_list:
-                            accounts.append({
-                                'username': _decrypt_string(account.get('username', '')) if account.get('username') else '',
-                                'api_token': _decrypt_string(account.get('api_token', '')) if account.get('api_token') else ''
-                            })
-                    else:
-                        accounts = account_list
-
-                # Old format - single credentials, convert to list
-                elif isinstance(data, dict) and 'username' in data and data.get('username'):
-                    if is_encrypted:
-                        accounts = [{
-                            'username': _decrypt_string(data.get('username', '')) if data.get('username') else '',
-                            'api_token': _decrypt_string(data.get('api_token', '')) if data.get('api_token') else ''
-                        }]
-                    else:
-                        accounts = [{
-                            'username': data.get('username', ''),
-                            'api_token': data.get('api_token', '')
-                        }]
-        except Exception as e:
-            _get_logger().error(f"Error reading credentials file: {str(e)}")
+    try:
+        accounts = _read_file_accounts()
+    except FileNotFoundError:
+        pass  # No credentials file yet, fall back to .env
+    except Exception as e:
+        _get_logger().error("Error reading credentials file: %s", e)
 
     # Fallback to .env if no accounts found
     if not accounts:
@@ -246,68 +361,215 @@ def get_all_credentials() -> List[Dict[str, str]]:
                     'api_token': env_token
                 }]
         except Exception as e:
-            _get_logger().error(f"Error reading credentials from .env: {str(e)}")
+            _get_logger().error("Error reading credentials from .env: %s", e)
 
     return accounts
 
 
-def save_credentials(username: str, api_token: str) -> bool:
+def get_credential_by_username(username: str) -> Optional[Dict[str, str]]:
     """
-    Save credentials to .credentials.json file.
-    Maintains backward compatibility with old format.
-    Credentials are encrypted before storage.
+    Get stored credentials for a single account from .credentials.json.
+
+    Accounts are matched by username HMAC where one is stored, falling back
+    to decrypting usernames for older entries; the API token is decrypted
+    for the matching account alone.
 
     Args:
-        username: Marketplace username
-        api_token: Marketplace API token
+        username: Marketplace username to look up
 
     Returns:
-        True if successful, False otherwise
+        Dictionary with credentials (username, api_token), or None if no stored account matches
     """
     try:
-        # Try to preserve existing accounts if using new format
-        existing_accounts = []
-        if os.path.exists(CREDENTIALS_FILE):
-            try:
-                # Get decrypted existing accounts
-                existing_accounts = get_all_credentials()
-            except (OSError, ValueError, KeyError):
-                pass  # Credentials file corrupted or unreadable, will create new
-
-        # Check if account already exists
-        account_exists = False
-        for account in existing_accounts:
-            if account.get('username') == username:
-                account['api_token'] = api_token
-                account_exists = True
-                break
-
-        if not account_exists:
-            existing_accounts.append({
-                'username': username,
+        data = _read_credentials_file()
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        _get_logger().error("Error reading credentials file: %s", e)
+        return None
+
+    if not isinstance(data, dict):
+        return None
+
+    is_encrypted = data.get('encrypted', False)
+    # Old format stores a single account at the top level
+    account_list = data.get('accounts', []) if 'accounts' in data else [data]
+
+    try:
+        username_hmac = _username_hmac(username) if is_encrypted else None
+        for account in account_list:
+            stored_hmac = account.get('username_hmac')
+            if stored_hmac:
+                # Indexed account: compare digests, no decryption needed
+                if stored_hmac != username_hmac:
+                    continue
+                stored_username = username
+            else:
+                stored_username = account.get('username', '')
+                if is_encrypted and stored_username:
+                    stored_username = _decrypt_string(stored_username)
+                if stored_username != username:
+                    continue
+
+            api_token = account.get('api_token', '')
+            if is_encrypted and api_token:
+                api_token = _decrypt_string(api_token)
+            return {
+                'username': stored_username,
                 'api_token': api_token
-            })
+            }
+    except Exception as e:
+        _get_logger().error("Error reading credentials file: %s", e)
 
-        # Encrypt all accounts
-        encrypted_accounts = []
-        for account in existing_accounts:
-            encrypted_accounts.append({
-                'username': _encrypt_string(account['username']) if account.get('username') else '',
-                'api_token': _encrypt_string(account['api_token']) if account.get('api_token') else ''
-            })
+    return None
+
+
+def _username_hmac(username: str) -> str:
+    """
+    Compute a deterministic HMAC of a username.
+
+    Fernet ciphertexts are randomized, so encrypted usernames cannot be
+    compared directly. Storing this digest next to each account lets
+    lookups and updates find an account without decrypting the others.
+    The signing half of the Fernet key is used as the HMAC key.
+
+    Args:
+        username: Plaintext username
+
+    Returns:
+        Hex-encoded HMAC-SHA256 digest
+    """
+    signing_key = base64.urlsafe_b64decode(_get_or_create_encryption_key())[:16]
+    return hmac.new(signing_key, username.encode(), hashlib.sha256).hexdigest()
+
+
+def _encrypt_account(username: str, api_token: str) -> Dict[str, str]:
+    """Build the stored (encrypted) form of an account."""
+    return {
+        'username': _encrypt_string(username) if username else '',
+        'api_token': _encrypt_string(api_token) if api_token else '',
+        'username_hmac': _username_hmac(username)
+    }
+
+
+def _stored_accounts(data: dict) -> List[Dict[str, str]]:
+    """
+    Convert parsed .credentials.json data to encrypted accounts with username HMACs.
+
+    Already encrypted accounts are kept as stored; only accounts written
+    before username HMACs existed need their username decrypted once.
+    Plain-text and old single-account files are encrypted on the way.
+
+    Args:
+        data: Parsed credentials file
+
+    Returns:
+        List of encrypted account dictionaries
+    """
+    if not isinstance(data, dict):
+        return []
+
+    is_encrypted = data.get('encrypted', False)
+    if 'accounts' in data:
+        account_list = data.get('accounts', [])
+    elif data.get('username'):
+        # Old format - single credentials
+        account_list = [data]
+    else:
+        account_list = []
+
+    accounts = []
+    for account in account_list:
+        if not is_encrypted:
+            accounts.append(_encrypt_account(account.get('username', ''), account.get('api_token', '')))
+            continue
+
+        username_hmac = account.get('username_hmac')
+        if not username_hmac:
+            username = _decrypt_string(account['username']) if account.get('username') else ''
+            username_hmac = _username_hmac(username)
+        accounts.append({
+            'username': account.get('username', ''),
+            'api_token': account.get('api_token', ''),
+            'username_hmac': username_hmac
+        })
+    return accounts
+
+
+def _merge_and_save_accounts(updates: List[Tuple[str, str]]) -> int:
+    """
+    Add or update accounts in .credentials.json with a single write.
+
+    Accounts are matched by username HMAC, so existing accounts are never
+    decrypted and only the updated fields are re-encrypted.
+
+    Args:
+        updates: (username, api_token) pairs, applied in order
+
+    Returns:
+        Number of accounts stored after the update
+
+    An existing file that cannot be read or decrypted (e.g. the encryption
+    key was lost) is moved to .credentials.json.corrupt and a new file is
+    started.
+
+    Raises:
+        OSError: If the unreadable file cannot be moved aside; it is left untouched
+    """
+    with _file_lock:
+        # Preserve existing accounts; never overwrite a file we could not read
+        try:
+            accounts = _stored_accounts(_read_credentials_file())
+        except FileNotFoundError:
+            accounts = []
+        except Exception as e:
+            _get_logger().error("Cannot read existing credentials (moving them to %s.corrupt): %s: %s",
+                                CREDENTIALS_FILE, type(e).__name__, e)
+            os.replace(CREDENTIALS_FILE, CREDENTIALS_FILE + '.corrupt')
+            accounts = []
+
+        by_hmac = {}
+        for account in accounts:
+            by_hmac.setdefault(account['username_hmac'], account)
+
+        for username, api_token in updates:
+            username_hmac = _username_hmac(username)
+            account = by_hmac.get(username_hmac)
+            if account is not None:
+                account['api_token'] = _encrypt_string(api_token) if api_token else ''
+            else:
+                account = _encrypt_account(username, api_token)
+                accounts.append(account)
+                by_hmac[username_hmac] = account
 
         credentials = {
             'encrypted': True,
-            'accounts': encrypted_accounts
+            'accounts': accounts
         }
 
-        with open(CREDENTIALS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(credentials, f, indent=2)
+        _write_credentials_file(credentials)
+        return len(accounts)
+
+
+def save_credentials(username: str, api_token: str) -> bool:
+    """
+    Save credentials to .credentials.json file.
+    Maintains backward compatibility with old format.
+    Credentials are encrypted before storage.
+
+    Args:
+        username: Marketplace username
+        api_token: Marketplace API token
 
-        _get_logger().info(f"Credentials saved successfully (encrypted, {len(existing_accounts)} account(s))")
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        count = _merge_and_save_accounts([(username, api_token)])
+        _get_logger().info("Credentials saved successfully (encrypted, %d account(s))", count)
         return True
     except Exception as e:
-        _get_logger().error(f"Error saving credentials: {str(e)}")
+        _get_logger().error("Error saving credentials: %s", e)
         return False
 
 
@@ -326,104 +588,122 @@ def save_multiple_credentials(accounts: List[Dict[str, str]]) -> bool:
         # Encrypt all accounts
         encrypted_accounts = []
         for account in accounts:
-            encrypted_accounts.append({
-                'username': _encrypt_string(account['username']) if account.get('username') else '',
-                'api_token': _encrypt_string(account['api_token']) if account.get('api_token') else ''
-            })
+            encrypted_accounts.append(_encrypt_account(account.get('username', ''), account.get('api_token', '')))
 
         credentials = {
             'encrypted': True,
             'accounts': encrypted_accounts
         }
 
-        with open(CREDENTIALS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(credentials, f, indent=2)
+        with _file_lock:
+            _write_credentials_file(credentials)
 
-        _get_logger().info(f"Saved {len(accounts)} encrypted account(s) successfully")
+        _get_logger().info("Saved %d encrypted account(s) successfully", len(accounts))
         return True
     except Exception as e:
-        _get_logger().error(f"Error saving credentials: {str(e)}")
+        _get_logger().error("Error saving credentials: %s", e)
         return False
 
 
 class CredentialsRotator:
-    """Manages rotation of multiple API credentials for parallel requests."""
+    """
+    Manages rotation of multiple API credentials for parallel requests.
+
+    get_next(), get_random() and get_all() hand out read-only views of the
+    loaded accounts instead of copying them on every call; use
+    get_next_mutable() if the caller needs a dictionary it can modify.
+    """
 
     def __init__(self):
         """Initialize credentials rotator."""
         self._lock = threading.Lock()
         self._accounts: List[Dict[str, str]] = []
-        self._current_index = 0
+        self._account_views: List[Mapping[str, str]] = []
+        self._cycle = itertools.cycle(())
+        self._rng = random.Random()  # nosec B311 - load balancing, not crypto
         self._load_accounts()
 
     def _load_accounts(self):
         """Load accounts from credentials file."""
         with self._lock:
-            self._accounts = get_all_credentials()
-            if not self._accounts:
-                # Fallback to single credentials for backward compatibility
-                creds = get_credentials()
-                if creds.get('username'):
-                    self._accounts = [creds]
-            self._current_index = 0
-
-    def get_next(self) -> Optional[Dict[str, str]]:
+            self._load_accounts_unlocked()
+
+    def _load_accounts_unlocked(self):
+        """Load accounts from credentials file. Caller must hold self._lock."""
+        self._accounts = get_all_credentials()
+        if not self._accounts:
+            # Fallback to single credentials for backward compatibility
+            creds = get_credentials()
+            if creds.get('username'):
+                self._accounts = [creds]
+        self._account_views = [MappingProxyType(dict(account)) for account in self._accounts]
+        self._cycle = itertools.cycle(self._account_views)
+
+    def get_next(self) -> Optional[Mapping[str, str]]:
         """
         Get next credentials in round-robin fashion.
 
         Returns:
-            Dictionary with 'username' and 'api_token', or None if no accounts available
+            Read-only mapping with 'username' and 'api_token', or None if no accounts available
         """
         with self._lock:
             if not self._accounts:
-                self._load_accounts()
+                # Only re-check after a reload; the loaded path does a single lookup
+                self._load_accounts_unlocked()
+                if not self._accounts:
+                    return None
 
-            if not self._accounts:
-                return None
+            return next(self._cycle)
 
-            account = self._accounts[self._current_index]
-            self._current_index = (self._current_index + 1) % len(self._accounts)
-            return account.copy()
+    def get_next_mutable(self) -> Optional[Dict[str, str]]:
+        """
+        Get next credentials in round-robin fashion as a modifiable copy.
 
-    def get_random(self) -> Optional[Dict[str, str]]:
+        Returns:
+            Dictionary with 'username' and 'api_token', or None if no accounts available
+        """
+        account = self.get_next()
+        return dict(account) if account is not None else None
+
+    def get_random(self) -> Optional[Mapping[str, str]]:
         """
         Get random credentials.
 
         Returns:
-            Dictionary with 'username' and 'api_token', or None if no accounts available
+            Read-only mapping with 'username' and 'api_token', or None if no accounts available
         """
         with self._lock:
-            if not self._accounts:
-                self._load_accounts()
+            accounts = self._account_views
+            if not accounts:
+                self._load_accounts_unlocked()
+                accounts = self._account_views
+                if not accounts:
+                    return None
 
-            if not self._accounts:
-                return None
-
-            return random.choice(self._accounts).copy()  # nosec B311 - load balancing, not crypto
+            return accounts[self._rng.randrange(len(accounts))]
 
-    def get_all(self) -> List[Dict[str, str]]:
+    def get_all(self) -> List[Mapping[str, str]]:
         """
         Get all available credentials.
 
         Returns:
-            List of dictionaries with 'username' and 'api_token'
+            List of read-only mappings with 'username' and 'api_token'
         """
         with self._lock:
             if not self._accounts:
-                self._load_accounts()
-            return [acc.copy() for acc in self._accounts]
+                self._load_accounts_unlocked()
+            return list(self._account_views)
 
     def count(self) -> int:
         """Get number of available accounts."""
         with self._lock:
             if not self._accounts:
-                self._load_accounts()
+                self._load_accounts_unlocked()
             return len(self._accounts)
 
     def reload(self):
         """Reload accounts from file."""
-        with self._lock:
-            self._load_accounts()
+        self._load_accounts()
 
 
 # Global instance
@@ -434,7 +714,11 @@ _rotator_lock = threading.Lock()
 def get_credentials_rotator() -> CredentialsRotator:
     """Get global credentials rotator instance."""
     global _rotator
-    with _rotator_lock:
-        if _rotator is None:
-            _rotator = CredentialsRotator()
-        return _rotator
+    rotator = _rotator
+    if rotator is None:
+        # Only the first call needs the lock; later calls return the instance directly
+        with _rotator_lock:
+            if _rotator is None:
+                _rotator = CredentialsRotator()
+            rotator = _rotator
+    return rotator
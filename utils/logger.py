@@ -1,8 +1,15 @@
 """Logging configuration for the marketplace scraper with log rotation."""
 
+import atexit
+import glob
+import itertools
 import logging
 import os
-import shutil
+import queue
+import stat
+import sys
+import threading
+import time
 from logging.handlers import RotatingFileHandler
 from config import settings
 
@@ -11,12 +18,242 @@ MAX_LOG_SIZE = 5 * 1024 * 1024  # 5 MB in bytes
 BACKUP_COUNT = 5  # Keep 5 backup files
 
 
+def _read_head_index(base_filename: str) -> int:
+    """Return the suffix number of the most recent backup of a log (0 if none)."""
+    try:
+        with open(base_filename + ".idx", 'r', encoding='utf-8') as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _write_head_index(base_filename: str, index: int):
+    """Record the suffix number of the most recent backup of a log."""
+    fd = os.open(base_filename + ".idx", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, str(index).encode('ascii'))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# Rotated-out log files waiting to be moved into their backup slot
+_ROTATE_Q = queue.Queue()
+_rotation_seq = itertools.count()  # keeps names unique while earlier rotations are pending
+_rotator_thread = None
+_rotator_lock = threading.Lock()
+# Rotated-out log files that could not be moved yet, retried on their log's next rollover
+_retry_rotations = []
+
+
+def _rotator_loop():
+    """Move rotated-out log files into the next backup slot, off the logging thread."""
+    while True:
+        item = _ROTATE_Q.get()
+        rotated_file, base_filename, backup_count = item
+        try:
+            next_index = (_read_head_index(base_filename) % backup_count) + 1
+            os.replace(rotated_file, f"{base_filename}.{next_index}")
+            _write_head_index(base_filename, next_index)
+        except OSError:
+            # Backup slot locked; unless another process moved the file already, try again later
+            if os.path.exists(rotated_file):
+                with _rotator_lock:
+                    _retry_rotations.append(item)
+        finally:
+            _ROTATE_Q.task_done()
+
+
+def _start_rotator():
+    """Start the background rotation thread if it is not running yet."""
+    global _rotator_thread
+    with _rotator_lock:
+        if _rotator_thread is None:
+            _rotator_thread = threading.Thread(target=_rotator_loop, name='log-rotator', daemon=True)
+            _rotator_thread.start()
+            # Finish pending rotations before the interpreter exits
+            atexit.register(_ROTATE_Q.join)
+
+
+def _queue_rotation(rotated_file: str, base_filename: str, backup_count: int):
+    """Queue a rotated-out log for its backup slot, after earlier ones of the same log that failed to move."""
+    _start_rotator()
+    with _rotator_lock:
+        retries = [item for item in _retry_rotations if item[1] == base_filename]
+        _retry_rotations[:] = [item for item in _retry_rotations if item[1] != base_filename]
+    for item in retries:
+        _ROTATE_Q.put(item)
+    _ROTATE_Q.put((rotated_file, base_filename, backup_count))
+
+
+def _sweep_rotated_files(base_filename: str, backup_count: int = BACKUP_COUNT):
+    """
+    Queue rotated-out files of a log left behind by earlier processes.
+
+    A process that exits (or fails to move the file) between renaming its
+    log out of the way and moving it into a backup slot leaves a
+    "<log>.rotating.<pid>.<n>" file; these are moved into the ring, oldest
+    first.
+    """
+    leftovers = []
+    for path in glob.glob(glob.escape(base_filename) + '.rotating.*'):
+        try:
+            leftovers.append((os.stat(path).st_mtime, path))
+        except OSError:
+            pass  # Moved by its own process meanwhile
+    for _, path in sorted(leftovers):
+        _start_rotator()
+        _ROTATE_Q.put((path, base_filename, backup_count))
+
+
+def _open_shared_delete(path: str, mode: str, encoding=None, errors=None):
+    """
+    Open a log file on Windows with FILE_SHARE_DELETE.
+
+    Files opened by the built-in open() cannot be renamed while any process
+    has them open. Sharing delete access gives POSIX-like semantics, so
+    rotation can rename the log even while other processes write to it.
+    """
+    import ctypes
+    import msvcrt
+    from ctypes import wintypes
+
+    GENERIC_WRITE = 0x40000000
+    FILE_SHARE_READ = 0x1
+    FILE_SHARE_WRITE = 0x2
+    FILE_SHARE_DELETE = 0x4
+    CREATE_ALWAYS = 2
+    OPEN_ALWAYS = 4
+    FILE_ATTRIBUTE_NORMAL = 0x80
+    INVALID_HANDLE_VALUE = wintypes.HANDLE(-1).value
+
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    create_file = kernel32.CreateFileW
+    create_file.argtypes = [wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID,
+                            wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE]
+    create_file.restype = wintypes.HANDLE
+
+    append = 'a' in mode
+    handle = create_file(
+        path,
+        GENERIC_WRITE,
+        FILE_SHARE_READ | FILE_SHARE_WRITE | FILE_SHARE_DELETE,
+        None,
+        OPEN_ALWAYS if append else CREATE_ALWAYS,
+        FILE_ATTRIBUTE_NORMAL,
+        None
+    )
+    if handle == INVALID_HANDLE_VALUE:
+        raise ctypes.WinError(ctypes.get_last_error())
+
+    fd = msvcrt.open_osfhandle(handle, os.O_WRONLY | os.O_BINARY | (os.O_APPEND if append else 0))
+    return os.fdopen(fd, mode, encoding=encoding, errors=errors)
+
+
 class SafeRotatingFileHandler(RotatingFileHandler):
     """
     RotatingFileHandler with Windows-safe rotation.
     Handles PermissionError when file is locked by another process.
+
+    Instead of shifting every backup up by one on each rollover, backups are
+    used as a ring: the number of the most recent backup is kept in a small
+    "<log>.idx" file and each rollover renames the log into the next slot,
+    overwriting the oldest backup. A rollover is therefore one rename no
+    matter how many backups are kept, but backup suffixes are no longer
+    ordered by age - use the modification time (or the .idx file) to find
+    the newest one.
+
+    The logging thread only renames the full log out of the way and reopens
+    a fresh file; moving it into its backup slot happens on a background
+    thread. A file that cannot be moved yet is retried on the log's next
+    rollover, and files left behind by earlier processes are moved when
+    setup_logging() runs.
+
+    Records are formatted once, encoded and appended with os.write() on the
+    descriptor of the open stream; the stream object is only used to hold
+    the file open. The log size is tracked in memory from the bytes written
+    and refreshed from the file every SIZE_CHECK_INTERVAL bytes, to pick up
+    records appended by other processes.
     """
-    
+
+    # Seconds to wait before retrying after the log could not be renamed
+    ROTATION_RETRY_DELAY = 60
+    _rotation_retry_at = 0.0
+    # Bytes to write between re-reading the log size from the open file
+    SIZE_CHECK_INTERVAL = 10 * 1024
+
+    def _open(self):
+        """Open the log file and remember whether it is a regular file."""
+        if os.name == 'nt':
+            # Allow renaming the log while it is open (see _open_shared_delete)
+            stream = _open_shared_delete(self.baseFilename, self.mode, self.encoding, self.errors)
+        else:
+            stream = super()._open()
+        self._fd = stream.fileno()
+        try:
+            st = os.fstat(self._fd)
+            self._is_regular_file = stat.S_ISREG(st.st_mode)
+            self._size = st.st_size
+        except OSError:
+            self._is_regular_file = True
+            self._size = 0
+        self._bytes_since_check = 0
+        return stream
+
+    def emit(self, record):
+        """
+        Emit a record.
+
+        Formats the record once and appends it to the log with a single
+        os.write(), rolling the file over first if needed.
+        """
+        try:
+            data = (self.format(record) + self.terminator).encode(self.encoding or 'utf-8', self.errors or 'strict')
+            if self.stream is None:  # delay was set...
+                self.stream = self._open()
+            if self._rollover_due(len(data)):
+                self.doRollover()
+            view = memoryview(data)
+            while view:
+                view = view[os.write(self._fd, view):]
+            self._size += len(data)
+        except RecursionError:  # See issue 36272
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def shouldRollover(self, record):
+        """
+        Determine if rollover should occur.
+
+        Uses the size tracked for the open stream; unlike the base class
+        this does not stat or seek the log on every record.
+        """
+        if self.stream is None:  # delay was set...
+            self.stream = self._open()
+        msg = "%s%s" % (self.format(record), self.terminator)
+        return self._rollover_due(len(msg.encode(self.encoding or 'utf-8', self.errors or 'strict')))
+
+    def _rollover_due(self, size: int) -> bool:
+        """
+        Check whether appending size bytes should roll the log over.
+
+        Non-regular files (e.g. /dev/null) are never rolled over, as in the
+        base class. After a failed rename, rollover is not retried for
+        ROTATION_RETRY_DELAY seconds.
+        """
+        if self.maxBytes <= 0 or not self._is_regular_file:
+            return False
+        self._bytes_since_check += size
+        if self._bytes_since_check >= self.SIZE_CHECK_INTERVAL:
+            self._bytes_since_check = 0
+            try:
+                self._size = os.fstat(self._fd).st_size
+            except OSError:
+                pass
+        return (self._size + size >= self.maxBytes
+                and time.monotonic() >= self._rotation_retry_at)
+
     def doRollover(self):
         """
         Do a rollover, as described in __init__().
@@ -26,67 +263,53 @@ class SafeRotatingFileHandler(RotatingFileHandler):
             self.stream.close()
             self.stream = None
         
-        # Check if file exists and needs rotation
-        if os.path.exists(self.baseFilename):
-            # Check file size
-            try:
-                if os.path.getsize(self.baseFilename) < self.maxBytes:
-                    # File is not large enough, reopen it
-                    self.stream = self._open()
-                    return
-            except OSError:
-                # Can't check size, reopen file
-                self.stream = self._open()
-                return
-            
-            # File needs rotation
-            dfn = self.baseFilename + ".1"
-            
-            # Remove oldest backup if exists
-            oldest_backup = f"{self.baseFilename}.{self.backupCount}"
-            if os.path.exists(oldest_backup):
-                try:
-                    os.remove(oldest_backup)
-                except OSError:
-                    pass  # Ignore if can't remove
-            
-            # Rotate existing backups
-            for i in range(self.backupCount - 1, 0, -1):
-                sfn = f"{self.baseFilename}.{i}"
-                dfn = f"{self.baseFilename}.{i + 1}"
-                if os.path.exists(sfn):
-                    try:
-                        if os.path.exists(dfn):
-                            os.remove(dfn)
-                        os.rename(sfn, dfn)
-                    except OSError:
-                        pass  # Ignore if can't rename (file might be locked)
-            
-            # Rotate main file
-            dfn = self.baseFilename + ".1"
+        # Check if file exists and needs rotation. Another process writing the
+        # same log may already have rotated it, in which case the file is small.
+        try:
+            needs_rotation = self.backupCount > 0 and os.stat(self.baseFilename).st_size >= self.maxBytes
+        except OSError:
+            needs_rotation = False  # Missing or can't check size, just reopen
+
+        if needs_rotation:
+            # Move the full log out of the way; the background thread puts it
+            # into the slot after the current head, replacing the oldest backup
+            rotated_file = f"{self.baseFilename}.rotating.{os.getpid()}.{next(_rotation_seq)}"
             try:
-                # Try rename first (fastest)
-                os.rename(self.baseFilename, dfn)
+                os.replace(self.baseFilename, rotated_file)
             except OSError:
-                # If rename fails (file locked), try copy + delete
-                try:
-                    if os.path.exists(dfn):
-                        os.remove(dfn)
-                    shutil.copy2(self.baseFilename, dfn)
-                    # Try to truncate original file instead of deleting
-                    try:
-                        with open(self.baseFilename, 'w') as f:
-                            f.truncate(0)
-                    except OSError:
-                        pass  # If can't truncate, just continue
-                except OSError:
-                    # If all fails, just continue - log will append to existing file
-                    pass
+                # Log is locked by a process that did not open it with delete
+                # sharing; keep appending to it and retry later
+                rotated_file = None
+                self._rotation_retry_at = time.monotonic() + self.ROTATION_RETRY_DELAY
+            if rotated_file:
+                _queue_rotation(rotated_file, self.baseFilename, self.backupCount)
         
         # Open new file
         self.stream = self._open()
 
 
+class _CachedTimeFormatter(logging.Formatter):
+    """
+    Formatter that formats each record's timestamp only once.
+
+    logging.Formatter.format() recomputes record.asctime for every handler,
+    so the formatted time is kept on the record and reused by the other
+    formatters of this class (e.g. download.log and failed_downloads.log).
+    """
+
+    def formatTime(self, record, datefmt=None):
+        if datefmt is not None:
+            return super().formatTime(record, datefmt)
+        asctime = record.__dict__.get('_default_asctime')
+        if asctime is None:
+            asctime = record._default_asctime = super().formatTime(record)
+        return asctime
+
+
+# Default formatter shared by the rotating handlers
+_FMT = _CachedTimeFormatter('%(asctime)s - %(levelname)s - %(message)s')
+
+
 def _get_rotating_handler(log_file: str, level: int = logging.INFO, formatter: logging.Formatter = None) -> SafeRotatingFileHandler:
     """
     Create a rotating file handler with 5 MB max size (Windows-safe).
@@ -106,91 +329,67 @@ def _get_rotating_handler(log_file: str, level: int = logging.INFO, formatter: l
         encoding='utf-8'
     )
     handler.setLevel(level)
-    if formatter is None:
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    handler.setFormatter(formatter)
+    handler.setFormatter(formatter or _FMT)
     return handler
 
 
+# Log files written by each named logger:
+# (logger name, logger level or None for LOG_LEVEL, ((file name, handler level, formatter or None), ...))
+_LOG_FILES = (
+    # App scraper
+    ('scraper', None, (('scraper.log', logging.INFO, None),)),
+    # Version scraper (separate from app scraper)
+    ('version_scraper', None, (('version_scraper.log', logging.INFO, None),)),
+    # Downloads, plus failed downloads (errors only)
+    ('download', None, (
+        ('download.log', logging.INFO, None),
+        ('failed_downloads.log', logging.ERROR, _CachedTimeFormatter('%(asctime)s - %(message)s')),
+    )),
+    # Description downloader
+    ('description_downloader', None, (('description_downloader.log', logging.INFO, None),)),
+    # Unhandled exceptions
+    ('error', logging.ERROR, (
+        ('errors.log', logging.ERROR, _CachedTimeFormatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s')),
+    )),
+)
+
+
 def setup_logging():
     """Configure logging for scraper, downloads, and failures with rotation."""
 
+    # Resolve LOG_LEVEL once; unknown names fall back to INFO
+    level = logging.getLevelNamesMapping().get(settings.LOG_LEVEL.upper(), logging.INFO)
+
     # Create logs directory if it doesn't exist
     os.makedirs(settings.LOGS_DIR, exist_ok=True)
+    prefix = os.path.join(settings.LOGS_DIR, '')
 
-    # Scraper log with rotation (for app scraper)
-    scraper_handler = _get_rotating_handler(
-        os.path.join(settings.LOGS_DIR, 'scraper.log'),
-        level=logging.INFO
-    )
-
-    # Version scraper log with rotation (separate from app scraper)
-    version_scraper_handler = _get_rotating_handler(
-        os.path.join(settings.LOGS_DIR, 'version_scraper.log'),
-        level=logging.INFO
-    )
-
-    # Download log with rotation
-    download_handler = _get_rotating_handler(
-        os.path.join(settings.LOGS_DIR, 'download.log'),
-        level=logging.INFO
-    )
+    # Configure root logger
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
 
-    # Failed downloads log (errors only) with rotation
-    failed_handler = _get_rotating_handler(
-        os.path.join(settings.LOGS_DIR, 'failed_downloads.log'),
-        level=logging.ERROR,
-        formatter=logging.Formatter('%(asctime)s - %(message)s')
-    )
+    # Configure specific loggers with rotating file handlers
+    # (do NOT add handlers to root to avoid duplication)
+    for name, logger_level, files in _LOG_FILES:
+        named_logger = logging.getLogger(name)
 
-    # Description downloader log with rotation
-    description_handler = _get_rotating_handler(
-        os.path.join(settings.LOGS_DIR, 'description_downloader.log'),
-        level=logging.INFO
-    )
+        # Remove handlers left by a previous call so records are not written twice
+        for handler in named_logger.handlers[:]:
+            named_logger.removeHandler(handler)
+            handler.close()
 
-    # Configure root logger
-    root_logger = logging.getLogger()
-    root_logger.setLevel(getattr(logging, settings.LOG_LEVEL))
-
-    # Configure specific loggers (do NOT add handlers to root to avoid duplication)
-    scraper_logger = logging.getLogger('scraper')
-    scraper_logger.setLevel(getattr(logging, settings.LOG_LEVEL))
-    scraper_logger.propagate = False
-    scraper_logger.addHandler(scraper_handler)
-
-    version_scraper_logger = logging.getLogger('version_scraper')
-    version_scraper_logger.setLevel(getattr(logging, settings.LOG_LEVEL))
-    version_scraper_logger.propagate = False
-    version_scraper_logger.addHandler(version_scraper_handler)
-
-    download_logger = logging.getLogger('download')
-    download_logger.setLevel(getattr(logging, settings.LOG_LEVEL))
-    download_logger.propagate = False
-    download_logger.addHandler(download_handler)
-    download_logger.addHandler(failed_handler)
-
-    description_logger = logging.getLogger('description_downloader')
-    description_logger.setLevel(getattr(logging, settings.LOG_LEVEL))
-    description_logger.propagate = False
-    description_logger.addHandler(description_handler)
-    
-    # Error logger for unhandled exceptions
-    error_handler = _get_rotating_handler(
-        os.path.join(settings.LOGS_DIR, 'errors.log'),
-        level=logging.ERROR,
-        formatter=logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s')
-    )
-    error_logger = logging.getLogger('error')
-    error_logger.propagate = False
-    error_logger.addHandler(error_handler)
-    error_logger.setLevel(logging.ERROR)
+        named_logger.setLevel(logger_level or level)
+        named_logger.propagate = False
+        for file_name, handler_level, formatter in files:
+            _sweep_rotated_files(prefix + file_name)
+            named_logger.addHandler(_get_rotating_handler(prefix + file_name, level=handler_level, formatter=formatter))
 
     # Reduce Flask/Werkzeug HTTP request noise (only log warnings and errors)
     logging.getLogger('werkzeug').setLevel(logging.WARNING)
 
     # Set up exception hook to log all unhandled exceptions
-    import sys
+    error_logger = logging.getLogger('error')
+
     def exception_handler(exc_type, exc_value, exc_traceback):
         """Log all unhandled exceptions."""
         if issubclass(exc_type, KeyboardInterrupt):
@@ -1,11 +1,35 @@
 """Rate limiter for API requests."""
 
+import threading
 import time
-from collections import deque
+
+from utils.logger import get_logger
+
+logger = get_logger('scraper')
+
+
+def _precise_sleep(seconds):
+    """
+    Sleep for the given time without oversleeping short waits.
+
+    time.sleep() can overshoot by a whole timer tick (~15 ms on Windows), so
+    the last couple of milliseconds are waited out in a yielding loop.
+    """
+    deadline = time.monotonic() + seconds
+    if seconds > 0.005:
+        time.sleep(seconds - 0.002)
+    while time.monotonic() < deadline:
+        time.sleep(0)  # Release the GIL to other threads while spinning
 
 
 class RateLimiter:
-    """Rate limiter to control API request frequency."""
+    """
+    Rate limiter to control API request frequency.
+
+    Safe to share between threads: each call reserves the next free request
+    slot under a short lock and then sleeps until that slot outside of it,
+    so concurrent callers are spaced out on a fixed schedule.
+    """
 
     def __init__(self, delay=0.5, requests_per_minute=None):
         """
@@ -17,47 +41,63 @@ class RateLimiter:
         """
         self.delay = delay
         self.requests_per_minute = requests_per_minute
-        self.last_request_time = None
-        self.request_times = deque(maxlen=requests_per_minute if requests_per_minute else 100)
+        self.last_request_time = None  # time.monotonic() slot of the last request
+        self._lock = threading.Lock()
+        self._min_delay = 0.5  # Floor that successful responses decay the delay to
+
+        # Token bucket for requests per minute, refilling continuously at
+        # requests_per_minute / 60 per second. It holds a single token, so
+        # requests are spaced evenly and no 60 s window ever has more than
+        # requests_per_minute of them (a bigger bucket would allow a burst
+        # on top of a minute's refill)
+        if requests_per_minute:
+            self._capacity = 1.0
+            self._rate = requests_per_minute / 60.0
+            self._tokens = self._capacity
+            self._last_refill = time.monotonic()
 
     def wait_if_needed(self):
         """Wait if necessary to respect rate limits."""
-        now = time.time()
-
-        # Simple delay-based rate limiting
-        if self.last_request_time is not None:
-            elapsed = now - self.last_request_time
-            if elapsed < self.delay:
-                sleep_time = self.delay - elapsed
-                time.sleep(sleep_time)
-                now = time.time()
-
-        # Requests per minute limiting (if configured)
-        if self.requests_per_minute:
-            # Remove requests older than 1 minute
-            cutoff_time = now - 60
-            while self.request_times and self.request_times[0] < cutoff_time:
-                self.request_times.popleft()
-
-            # If at capacity, wait until oldest request expires
-            if len(self.request_times) >= self.requests_per_minute:
-                sleep_time = 60 - (now - self.request_times[0])
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
-                    now = time.time()
-
-            self.request_times.append(now)
-
-        self.last_request_time = now
+        with self._lock:
+            slot = time.monotonic()
+
+            # Simple delay-based rate limiting
+            if self.last_request_time is not None:
+                slot = max(slot, self.last_request_time + self.delay)
+
+            # Requests per minute limiting (if configured)
+            if self.requests_per_minute:
+                tokens = min(self._capacity, self._tokens + (slot - self._last_refill) * self._rate)
+                if tokens < 1.0:
+                    # Bucket is empty; wait until a whole token has refilled
+                    slot += (1.0 - tokens) / self._rate
+                    tokens = 0.0
+                else:
+                    tokens -= 1.0
+                self._tokens = tokens
+                self._last_refill = slot
+
+            self.last_request_time = slot
+
+        sleep_time = slot - time.monotonic()
+        if sleep_time > 0:
+            _precise_sleep(sleep_time)
 
     def adaptive_delay(self, status_code):
         """Adjust delay based on HTTP response status code."""
+        if status_code == 200:
+            # Common case: nothing to do once the delay is back at its floor
+            if self.delay > self._min_delay:
+                with self._lock:
+                    # Gradually decrease delay on success
+                    self.delay = max(self.delay * 0.9, self._min_delay)
+            return
+
         if status_code == 429:  # Too Many Requests
-            self.delay = min(self.delay * 2, 10.0)  # Double delay, max 10s
-            print(f"⚠️ Rate limited (429). Increasing delay to {self.delay}s")
+            with self._lock:
+                self.delay = delay = min(self.delay * 2, 10.0)  # Double delay, max 10s
+            logger.warning("Rate limited (429). Increasing delay to %.2fs", delay)
         elif status_code >= 500:  # Server errors
-            self.delay = min(self.delay * 1.5, 5.0)  # Increase delay, max 5s
-            print(f"⚠️ Server error ({status_code}). Increasing delay to {self.delay}s")
-        elif status_code == 200 and self.delay > 0.5:
-            # Gradually decrease delay on success
-            self.delay = max(self.delay * 0.9, 0.5)
+            with self._lock:
+                self.delay = delay = min(self.delay * 1.5, 5.0)  # Increase delay, max 5s
+            logger.warning("Server error (%s). Increasing delay to %.2fs", status_code, delay)
@@ -1,11 +1,42 @@
 """Settings manager for reading and updating .env file."""
 
+import logging
 import os
+import re
+import stat
+import tempfile
+import threading
 from typing import Dict
 from utils.logger import get_logger
 
 logger = get_logger('settings_manager')
 
+# Key of a KEY=VALUE line (leading whitespace allowed, no space before '=')
+_ENV_KEY_RE = re.compile(r'\s*([^#=\s][^=\s]*)=')
+
+# KEY=VALUE lines that are not comments; surrounding whitespace is not captured.
+# [^\S\n] is any whitespace but a newline: what str.strip() removed per line
+_ENV_LINE_RE = re.compile(r'^(?![^\S\n]*#)[^\S\n]*([^=\n]*?)[^\S\n]*=[^\S\n]*(.*?)[^\S\n]*$', re.M)
+
+# Last parsed .env, reused while the file's inode, mtime and size are unchanged.
+# Our own rewrites reset it. On filesystems with coarse mtimes (e.g. 2 s on FAT,
+# 1 s on some network shares), an outside edit that keeps the size, is made in
+# place and lands within the same mtime tick can go unnoticed until the next change.
+_ENV_CACHE = {'stamp': None, 'data': {}}
+_env_cache_lock = threading.Lock()
+
+# fdatasync skips syncing metadata the data does not depend on (e.g. mtime);
+# not available on macOS/Windows
+_fdatasync = getattr(os, 'fdatasync', os.fsync)
+
+# Serializes rewrites of .env so concurrent updates do not drop each other's keys
+_write_lock = threading.Lock()
+
+# Escapes for control characters in logged user input (tab is kept)
+_CTRL_TABLE = {i: f'\\x{i:02x}' for i in range(32) if i != 9}
+_CTRL_TABLE[10] = '\\n'
+_CTRL_TABLE[13] = '\\r'
+
 
 def _sanitize_for_log(value: str, max_length: int = 200) -> str:
     """Sanitize user input for safe logging to prevent log injection.
@@ -24,10 +55,8 @@ def _sanitize_for_log(value: str, max_length: int = 200) -> str:
         return '<None>'
     if not isinstance(value, str):
         value = str(value)
-    # Replace newlines that could inject fake log entries
-    sanitized = value.replace('\n', '\\n').replace('\r', '\\r')
-    # Replace other control characters
-    sanitized = ''.join(char if ord(char) >= 32 or char == '\t' else f'\\x{ord(char):02x}' for char in sanitized)
+    # Escape newlines (which could inject fake log entries) and other control characters
+    sanitized = value.translate(_CTRL_TABLE)
     # Truncate to max length
     if len(sanitized) > max_length:
         sanitized = sanitized[:max_length] + '...[truncated]'
@@ -57,25 +86,28 @@ def read_env_settings() -> Dict[str, str]:
             # Test if decouple can load config from any location
             config('LOG_LEVEL', default='INFO')
             # If we get here, decouple found a config file somewhere
-            logger.debug(f".env file not at {env_path}, but decouple found config elsewhere")
+            logger.debug(".env file not at %s, but decouple found config elsewhere", env_path)
         except Exception:
             logger.warning(f".env file not found at {env_path}")
         return settings_dict
     
     try:
+        st = os.stat(env_path)
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        with _env_cache_lock:
+            if _ENV_CACHE['stamp'] == stamp:
+                return dict(_ENV_CACHE['data'])
+
         with open(env_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                # Skip comments and empty lines
-                if not line or line.startswith('#'):
-                    continue
-                
-                # Parse KEY=VALUE
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip().strip('"').strip("'")
-                    settings_dict[key] = value
+            text = f.read()
+
+        # Parse KEY=VALUE lines, skipping comments and empty lines
+        settings_dict = {key: value.strip('"').strip("'") for key, value in _ENV_LINE_RE.findall(text)}
+
+        with _env_cache_lock:
+            _ENV_CACHE['stamp'] = stamp
+            _ENV_CACHE['data'] = settings_dict
+        settings_dict = dict(settings_dict)
     except Exception as e:
         logger.error(f"Error reading .env file: {str(e)}")
     
@@ -93,45 +125,7 @@ def update_env_setting(key: str, value: str) -> bool:
     Returns:
         True if successful, False otherwise
     """
-    env_path = get_env_file_path()
-    
-    if not os.path.exists(env_path):
-        logger.error(f".env file not found at {env_path}")
-        return False
-    
-    try:
-        # Read current content
-        with open(env_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        # Update or add setting
-        updated = False
-        new_lines = []
-        
-        for line in lines:
-            # Check if line starts with key= (with optional whitespace)
-            stripped = line.strip()
-            if stripped.startswith(f'{key}='):
-                # Update the line
-                new_lines.append(f'{key}={value}\n')
-                updated = True
-            else:
-                new_lines.append(line)
-        
-        # If not found, add at the end
-        if not updated:
-            new_lines.append(f'{key}={value}\n')
-        
-        # Write back
-        with open(env_path, 'w', encoding='utf-8') as f:
-            f.writelines(new_lines)
-        
-        logger.info(f"Updated {_sanitize_for_log(key)} in .env file")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Error updating .env file: {str(e)}")
-        return False
+    return update_env_settings({key: value})[key]
 
 
 def update_env_settings(settings_dict: Dict[str, str]) -> Dict[str, bool]:
@@ -144,8 +138,70 @@ def update_env_settings(settings_dict: Dict[str, str]) -> Dict[str, bool]:
     Returns:
         Dictionary mapping keys to success status (True/False)
     """
-    results = {}
-    for key, value in settings_dict.items():
-        results[key] = update_env_setting(key, value)
-    return results
+    if not settings_dict:
+        return {}
+    return _write_env_settings(settings_dict)
+
+
+def _write_env_settings(settings_dict: Dict[str, str]) -> Dict[str, bool]:
+    """
+    Write settings to .env in a single pass.
 
+    The file is streamed once into a temporary file with all keys updated,
+    which then atomically replaces .env.
+    """
+    with _write_lock:
+        env_path = get_env_file_path()
+        
+        if not os.path.exists(env_path):
+            logger.error(f".env file not found at {env_path}")
+            return {key: False for key in settings_dict}
+        
+        tmp = None
+        try:
+            # Copy .env line by line into a temp file next to it, rewriting
+            # existing settings in place
+            with open(env_path, 'r', encoding='utf-8') as src, tempfile.NamedTemporaryFile(
+                    'w', encoding='utf-8', dir=os.path.dirname(env_path),
+                    prefix='.env.', suffix='.tmp', delete=False) as tmp:
+                found = set()
+                written = '\n'  # Last line written
+                for line in src:
+                    match = _ENV_KEY_RE.match(line)
+                    if match and match.group(1) in settings_dict:
+                        key = match.group(1)
+                        written = f'{key}={settings_dict[key]}\n'
+                        found.add(key)
+                    else:
+                        written = line
+                    tmp.write(written)
+                
+                # Add settings that were not found at the end
+                missing = [key for key in settings_dict if key not in found]
+                if missing and not written.endswith('\n'):
+                    tmp.write('\n')
+                for key in missing:
+                    tmp.write(f'{key}={settings_dict[key]}\n')
+                
+                tmp.flush()
+                _fdatasync(tmp.fileno())
+            
+            # Swap the temp file in, keeping the original permissions
+            os.chmod(tmp.name, stat.S_IMODE(os.stat(env_path).st_mode))
+            os.replace(tmp.name, env_path)
+            with _env_cache_lock:
+                _ENV_CACHE['stamp'] = None
+            
+            if logger.isEnabledFor(logging.INFO):
+                for key in settings_dict:
+                    logger.info("Updated %s in .env file", _sanitize_for_log(key))
+            return {key: True for key in settings_dict}
+            
+        except Exception as e:
+            logger.error(f"Error updating .env file: {str(e)}")
+            if tmp is not None:
+                try:
+                    os.remove(tmp.name)
+                except OSError:
+                    pass
+            return {key: False for key in settings_dict}
@@ -1,19 +1,42 @@
 """Task manager for running scraper scripts from web interface."""
 
+import atexit
+import codecs
+import contextlib
+import functools
+import io
+import itertools
 import os
+import queue
+import selectors
+import shutil
 import subprocess
+import sys
 import json
 import threading
+import time
 import signal
 import re
+from collections import deque
 from datetime import datetime
 from typing import Dict, Optional
 from config import settings
 from utils.logger import get_logger
 
+try:
+    import orjson
+except ImportError:  # Optional speedup, fall back to the standard library
+    orjson = None
+
 logger = get_logger('task_manager')
 
 
+# Escapes for control characters in logged user input (tab is kept)
+_CTRL_TABLE = {i: f'\\x{i:02x}' for i in range(32) if i != 9}
+_CTRL_TABLE[10] = '\\n'
+_CTRL_TABLE[13] = '\\r'
+
+
 def _sanitize_for_log(value: str, max_length: int = 200) -> str:
     """Sanitize user input for safe logging to prevent log injection.
 
@@ -31,133 +54,576 @@ def _sanitize_for_log(value: str, max_length: int = 200) -> str:
         return '<None>'
     if not isinstance(value, str):
         value = str(value)
-    # Replace newlines that could inject fake log entries
-    sanitized = value.replace('\n', '\\n').replace('\r', '\\r')
-    # Replace other control characters
-    sanitized = ''.join(char if ord(char) >= 32 or char == '\t' else f'\\x{ord(char):02x}' for char in sanitized)
+    # Escape newlines (which could inject fake log entries) and other control characters
+    sanitized = value.translate(_CTRL_TABLE)
     # Truncate to max length
     if len(sanitized) > max_length:
         sanitized = sanitized[:max_length] + '...[truncated]'
     return sanitized
 
 
-# Task status file
+# Output lines that update a task's current action (same words as before:
+# scraping/scrape, downloading/download, processing/process, saving/save, ...)
+_ACTION_RE = re.compile(r'scrap(?:e|ing)|download|process|sav(?:e|ing)|fetch|completed|starting', re.IGNORECASE)
+# tqdm progress bars: a '|' plus a '[' or '█' anywhere in the line; group 1
+# is the description before the first '|', '%' or ':'
+_TQDM_RE = re.compile(r'(?=.*\|)(?=.*[\[█])([^|%:]*)')
+# Progress in output lines: "817/2290" (preferred) or "50%"; both need a digit
+_DIGIT_RE = re.compile(r'\d')
+_RATIO_RE = re.compile(r'(\d+)/(\d+)')
+_PERCENT_RE = re.compile(r'(\d+)%')
+# Lines reporting a successful finish, scanned in the output tail of completed tasks
+_DONE_RE = re.compile(r'completed successfully|finished|done|\[ok\]', re.IGNORECASE)
+# Lines worth surfacing as the error message of a failed task
+_ERROR_RE = re.compile(r'error|failed|exception|traceback|❌', re.IGNORECASE)
+
+# Number of trailing output lines kept per task (for 'output'/'error')
+OUTPUT_TAIL_LINES = 200
+
+# Task status file, and the journal of changes made since it was last written
 TASK_STATUS_FILE = os.path.join(settings.METADATA_DIR, 'task_status.json')
+TASK_EVENTS_FILE = os.path.join(settings.METADATA_DIR, 'task_events.jsonl')
+
+# Seconds to collect status changes before flushing the journal
+STATUS_SAVE_DELAY = 0.5
+# Seconds between rewrites of the status file from memory (the journal is then emptied)
+STATUS_COMPACT_INTERVAL = 60
+
+# Finished tasks are forgotten when there are more than MAX_TASKS tasks (oldest
+# first), or when they finished more than TASK_MAX_AGE seconds ago
+FINAL_STATUSES = ('completed', 'failed', 'cancelled')
+MAX_TASKS = 1000
+TASK_MAX_AGE = 7 * 86400
+
+
+# Security: Whitelist of allowed scripts
+ALLOWED_SCRIPTS = frozenset({
+    'run_scraper.py',
+    'run_version_scraper.py',
+    'run_downloader.py',
+    'run_description_downloader.py',
+    'run_index_search.py'
+})
+# Script names must not contain '..' or path separators
+_PATH_TRAVERSAL_RE = re.compile(r'\.\.|[/\\]')
+
+# Project directory (task scripts live here) and the interpreter that runs them:
+# the project's venv if there is one, else the one running this app
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_VENV_PYTHON = os.path.join(_BASE_DIR, 'venv', 'Scripts', 'python.exe')
+_PYTHON_EXE = _VENV_PYTHON if os.path.exists(_VENV_PYTHON) else sys.executable
+
+# Log file written by each task script
+_SCRAPER_LOG = os.path.join(settings.LOGS_DIR, 'scraper.log')
+_LOG_FILES = {
+    'run_scraper.py': _SCRAPER_LOG,
+    'run_version_scraper.py': _SCRAPER_LOG,
+    'run_downloader.py': os.path.join(settings.LOGS_DIR, 'download.log'),
+    'run_description_downloader.py': os.path.join(settings.LOGS_DIR, 'description_downloader.log')
+}
+# Log file of each full pipeline step:
+# 1 = Scrape Apps, 2 = Scrape Versions, 3 = Download Binaries, 4 = Download Descriptions
+_PIPELINE_STEP_LOG_FILES = {
+    1: _LOG_FILES['run_scraper.py'],
+    2: _LOG_FILES['run_version_scraper.py'],
+    3: _LOG_FILES['run_downloader.py'],
+    4: _LOG_FILES['run_description_downloader.py']
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _script_path(script_name: str) -> str:
+    """Get the path of a task script, checking once that it exists."""
+    script_path = os.path.join(_BASE_DIR, script_name)
+    if not os.path.exists(script_path):
+        raise FileNotFoundError(f"Script not found: {script_path}")
+    return script_path
+
+
+def _find_last_line(text: str, pattern: re.Pattern, max_lines: Optional[int] = None) -> Optional[str]:
+    """Find the last non-blank line of text matching pattern, scanning backwards.
+
+    Only the last max_lines lines are looked at (all if None). Returns the
+    stripped line, or None.
+    """
+    end = len(text)
+    count = 0
+    while end >= 0 and (max_lines is None or count < max_lines):
+        start = text.rfind('\n', 0, end) + 1
+        line = text[start:end].strip()
+        if line and pattern.search(line):
+            return line
+        end = start - 1
+        count += 1
+    return None
+
+
+@contextlib.contextmanager
+def _status_files_locked():
+    """Hold an exclusive lock on the task status files against other processes."""
+    with open(TASK_STATUS_FILE + '.lock', 'a+b') as f:
+        if os.name == 'nt':
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)  # Retries for up to 10 seconds
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _pidfd_open(pid: int) -> Optional[int]:
+    """Open a pidfd for a process, or return None where pidfds are unavailable (Linux 5.3+ only)."""
+    try:
+        return os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        return None
+
+
+def _read_lines(process: subprocess.Popen, pidfd: Optional[int] = None):
+    """Yield lines of a task's output until the task exits.
+
+    Lines come in lists, one per read from the pipe, so a burst of output
+    can be handled as a whole.
+
+    Iterating process.stdout waits for EOF, which never comes while a
+    background child of the script still holds the pipe. Given the
+    process's pidfd, reading stops once the script itself has exited and
+    the pipe is drained.
+    """
+    if pidfd is None:
+        for line in process.stdout:
+            yield [line]
+        return
+
+    fd = process.stdout.fileno()
+    # Same decoding and newline handling as the text-mode process.stdout
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(errors='replace'), translate=True)
+    pending = ''
+    exited = False
+    with selectors.DefaultSelector() as selector:
+        selector.register(fd, selectors.EVENT_READ)
+        selector.register(pidfd, selectors.EVENT_READ)
+        while True:
+            ready = {key.fd for key, _ in selector.select(0 if exited else None)}
+            if pidfd in ready:
+                exited = True
+                selector.unregister(pidfd)
+            if fd not in ready:
+                if exited:
+                    break  # Exited and nothing left to read
+                continue
+            data = os.read(fd, 65536)
+            if not data:
+                break
+            lines = (pending + decoder.decode(data)).split('\n')
+            pending = lines.pop()
+            if lines:
+                yield [line + '\n' for line in lines]
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield [pending]
+
+
+def _stop_process_group(process: subprocess.Popen, force: bool = False, pidfd: Optional[int] = None):
+    """Stop a task process together with its children.
+
+    Task processes are started as process group leaders (see _run_task), so
+    one signal reaches the whole tree. Given the leader's pidfd, the leader
+    is signalled through it first: that raises ProcessLookupError once the
+    task has been reaped, so a reused PID is never signalled.
+    """
+    if os.name == 'nt':
+        if not force:
+            try:
+                # Reaches the whole group, but only if this process shares the task's console
+                os.kill(process.pid, signal.CTRL_BREAK_EVENT)
+                return
+            except OSError as e:
+                logger.info("Cannot send CTRL_BREAK to PID %s (%s), terminating it instead", process.pid, e)
+        process.terminate()  # TerminateProcess, on the leader only
+        return
+    sig = signal.SIGKILL if force else signal.SIGTERM
+    if pidfd is not None:
+        signal.pidfd_send_signal(pidfd, sig)
+    elif process.returncode is not None:
+        raise ProcessLookupError(f"Process {process.pid} has already been reaped")
+    os.killpg(process.pid, sig)
+
+
+def _wait_exited(process: subprocess.Popen, timeout: float, pidfd: Optional[int] = None) -> bool:
+    """Wait up to timeout seconds for a task process to exit.
+
+    Popen.wait(timeout) polls with sleeps of up to 50 ms on POSIX; the
+    process's pidfd wakes up as soon as it exits. The process is left for
+    _run_task to reap.
+    """
+    if pidfd is None:
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return False
+        return True
+    with selectors.DefaultSelector() as selector:
+        selector.register(pidfd, selectors.EVENT_READ)
+        return bool(selector.select(timeout))
+
+
+if orjson is not None:
+    def _json_loads(data: bytes):
+        return orjson.loads(data)
+
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+else:
+    def _json_loads(data: bytes):
+        return json.loads(data)
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
 
 
 class TaskManager:
-    """Manages background tasks for scraper operations."""
+    """
+    Manages background tasks for scraper operations.
+
+    Task status dicts in self.tasks are never modified once stored: writers
+    replace them with updated copies (see _update_task) while holding that
+    task's lock, so readers can use self.tasks without locking.
+    """
     
     def __init__(self):
         """Initialize task manager."""
         self.tasks = {}
         self.processes = {}  # Store process objects for cancellation
-        self.lock = threading.Lock()
+        self._pidfds: Dict[str, int] = {}  # pidfds of running task processes (owned by _run_task)
+        self.task_events: Dict[str, threading.Event] = {}  # Set when a task reaches a final status
+        self._pipeline_cancel: Dict[str, threading.Event] = {}  # Set to stop a running pipeline
+        self._task_locks: Dict[str, threading.RLock] = {}  # Guard writes to each task
+        self._save_lock = threading.Lock()  # Serializes writes of the status file
+        self._journal_lock = threading.Lock()  # Serializes journal appends and truncation
+        self._dirty = threading.Event()  # Set when the journal has unflushed changes
+        self._compacted_at = time.monotonic()
+        self._latest_by_type: Dict[str, str] = {}  # Task type -> ID of its most recently started task
+        # get_all_tasks() shares one copy of self.tasks until the next change (see _changed)
+        self._versions = itertools.count(1)
+        self._version = 0
+        self._snapshot = (-1, {})
+        os.makedirs(os.path.dirname(TASK_STATUS_FILE), exist_ok=True)
+        self._event_log = open(TASK_EVENTS_FILE, 'ab', buffering=8192)
+
+        # Environment for task scripts, prepared once
+        self._child_env = os.environ.copy()
+        # Ensure Python path includes the project directory
+        pythonpath = self._child_env.get('PYTHONPATH', '')
+        if pythonpath:
+            self._child_env['PYTHONPATH'] = f"{_BASE_DIR}{os.pathsep}{pythonpath}"
+        else:
+            self._child_env['PYTHONPATH'] = _BASE_DIR
         self._load_status()
+        self._rebuild_latest_index()
+
+        # Task and pipeline runners execute on reusable worker threads (see _submit)
+        self._work = queue.SimpleQueue()
+        self._workers_lock = threading.Lock()
+        self._idle_workers = 0
+
+        # Status changes are written by a background thread, at most every STATUS_SAVE_DELAY seconds
+        threading.Thread(target=self._flush_loop, name='task-status-flusher', daemon=True).start()
+        atexit.register(self.flush)
     
     def _load_status(self):
-        """Load task status from file."""
-        if os.path.exists(TASK_STATUS_FILE):
+        """Load task status from file, then replay the changes journaled since."""
+        with _status_files_locked():
+            if os.path.exists(TASK_STATUS_FILE):
+                try:
+                    with open(TASK_STATUS_FILE, 'rb') as f:
+                        self.tasks = _json_loads(f.read())
+                except Exception as e:
+                    # Keep the unreadable file instead of overwriting it on the next save
+                    logger.error("Error loading task status (moving it to %s.corrupt): %s", TASK_STATUS_FILE, e)
+                    try:
+                        os.replace(TASK_STATUS_FILE, TASK_STATUS_FILE + '.corrupt')
+                    except OSError as e:
+                        logger.error("Could not move unreadable task status file aside: %s", e)
+                    self.tasks = {}
+            
+            journaled = 0
+            # The .old journal is left over when a snapshot was not written (see _write_status)
+            for events_file in (TASK_EVENTS_FILE + '.old', TASK_EVENTS_FILE):
+                try:
+                    with open(events_file, 'rb') as f:
+                        for line in f:
+                            # Counted even if torn, so compaction drops it before anything is appended to it
+                            journaled += 1
+                            try:
+                                event = _json_loads(line)
+                            except ValueError:
+                                continue  # Line cut short by a crash
+                            task_id = event['id']
+                            if 'task' in event:
+                                self.tasks[task_id] = event['task']
+                            elif event.get('removed'):
+                                self.tasks.pop(task_id, None)
+                            elif task_id in self.tasks:
+                                self.tasks[task_id] = {**self.tasks[task_id], **event['patch']}
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    logger.error("Error replaying task events: %s", e)
+        if journaled:
+            self._write_status()
+    
+    def _journal(self, event: Dict):
+        """Append a status change to the journal (flushed by the background thread)."""
+        event['t'] = time.time()
+        line = _json_dumps(event) + b'\n'
+        with self._journal_lock:
+            self._event_log.write(line)
+        self._dirty.set()
+    
+    def _flush_loop(self):
+        """Flush the journal shortly after changes, and rewrite the status file periodically."""
+        while True:
+            self._dirty.wait()
+            time.sleep(STATUS_SAVE_DELAY)
+            self._dirty.clear()
+            if time.monotonic() - self._compacted_at >= STATUS_COMPACT_INTERVAL:
+                self._write_status()
+            else:
+                with self._journal_lock:
+                    self._event_log.flush()
+    
+    def flush(self):
+        """Write pending task status changes to file now."""
+        self._dirty.clear()
+        self._write_status()
+    
+    def _write_status(self):
+        """Save task status to file and drop the journal it replaces.
+
+        Only taking the snapshot and switching to a fresh journal happen under
+        the journal lock, so status updates don't wait for the file to be written.
+        """
+        with self._save_lock:
+            tmp_file = TASK_STATUS_FILE + '.tmp'
             try:
-                with open(TASK_STATUS_FILE, 'r', encoding='utf-8') as f:
-                    self.tasks = json.load(f)
+                with _status_files_locked():
+                    with self._journal_lock:
+                        # Task dicts are never modified in place, so a shallow copy is a consistent snapshot;
+                        # changes journaled from here on go to the fresh journal
+                        tasks = dict(self.tasks)
+                        self._rotate_journal()
+                    data = _json_dumps(tasks)
+                    with open(tmp_file, 'wb') as f:
+                        f.write(data)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_file, TASK_STATUS_FILE)
+                    os.remove(TASK_EVENTS_FILE + '.old')
+                self._compacted_at = time.monotonic()
             except Exception as e:
-                logger.error(f"Error loading task status: {str(e)}")
-                self.tasks = {}
+                logger.error("Error saving task status: %s", e)
     
-    def _save_status(self):
-        """Save task status to file."""
-        try:
-            os.makedirs(os.path.dirname(TASK_STATUS_FILE), exist_ok=True)
-            with open(TASK_STATUS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(self.tasks, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            logger.error(f"Error saving task status: {str(e)}")
+    def _rotate_journal(self):
+        """Move the journal to <journal>.old and start a new one (journal lock held)."""
+        self._event_log.close()
+        old_file = TASK_EVENTS_FILE + '.old'
+        if os.path.exists(old_file):
+            # The last snapshot failed; keep these changes after the ones it didn't cover
+            with open(TASK_EVENTS_FILE, 'rb') as src, open(old_file, 'rb+') as dst:
+                # Don't run the first copied change into a line torn by a crash
+                if dst.seek(0, os.SEEK_END):
+                    dst.seek(-1, os.SEEK_END)
+                    if dst.read(1) != b'\n':
+                        dst.write(b'\n')
+                shutil.copyfileobj(src, dst)
+            os.remove(TASK_EVENTS_FILE)
+        else:
+            os.replace(TASK_EVENTS_FILE, old_file)
+        self._event_log = open(TASK_EVENTS_FILE, 'ab', buffering=8192)
+    
+    def _task_lock(self, task_id: str) -> threading.RLock:
+        """Get the lock guarding writes to a task."""
+        lock = self._task_locks.get(task_id)
+        if lock is None:
+            lock = self._task_locks.setdefault(task_id, threading.RLock())
+        return lock
+    
+    @staticmethod
+    def _task_type(task_id: str) -> str:
+        """Get the type of a task from its ID (e.g. 'scrape_apps' for 'scrape_apps_20250101_120000')."""
+        return task_id.rsplit('_', 2)[0]
+    
+    def _rebuild_latest_index(self):
+        """Recompute the most recently started task of each type."""
+        latest = {}
+        for task_id, task in self.tasks.copy().items():
+            key = (task.get('started_at_ts', 0), task.get('started_at', ''))
+            task_type = self._task_type(task_id)
+            if task_type not in latest or key >= latest[task_type][0]:
+                latest[task_type] = (key, task_id)
+        self._latest_by_type = {task_type: task_id for task_type, (_, task_id) in latest.items()}
+    
+    def _changed(self):
+        """Invalidate the get_all_tasks() snapshot; call after changing self.tasks."""
+        self._version = next(self._versions)
+    
+    def _put_task(self, task_id: str, task: Dict):
+        """Store a new status dict for a task and save."""
+        with self._task_lock(task_id):
+            self.tasks[task_id] = task
+            self._changed()
+            self._journal({'id': task_id, 'task': task})
+        self._latest_by_type[self._task_type(task_id)] = task_id
+    
+    def _update_task(self, task_id: str, **changes):
+        """Replace a task's status dict with an updated copy and save.
+
+        Fields that already have the given value are left out; if nothing
+        changes, nothing is written.
+        """
+        with self._task_lock(task_id):
+            task = self.tasks.get(task_id)
+            if task is None:
+                return  # Removed (e.g. cleared while it was being cancelled); don't bring it back
+            changes = {k: v for k, v in changes.items() if k not in task or task[k] != v}
+            if not changes:
+                return
+            self.tasks[task_id] = {**task, **changes}
+            self._changed()
+            self._journal({'id': task_id, 'patch': changes})
+        if changes.get('status') in FINAL_STATUSES:
+            self._evict_old()
+    
+    def _evict_old(self):
+        """Forget finished tasks beyond MAX_TASKS (oldest first) or older than TASK_MAX_AGE."""
+        cutoff = datetime.fromtimestamp(time.time() - TASK_MAX_AGE).isoformat()
+        excess = len(self.tasks) - MAX_TASKS
+        to_remove = []
+        for task_id, task in self.tasks.copy().items():  # In order of creation
+            # Tasks from older status files may lack finished_at; never age out a task with no time at all
+            finished_at = task.get('finished_at') or task.get('started_at')
+            if task.get('status') in FINAL_STATUSES and (excess > 0 or (finished_at and finished_at < cutoff)):
+                to_remove.append(task_id)
+                excess -= 1
+        if to_remove:
+            # Skip tasks locked by other threads (they may hold our caller's task lock)
+            self._remove_tasks(to_remove, blocking=False)
+    
+    def _remove_tasks(self, task_ids: list, blocking: bool = True):
+        """Forget tasks, in memory and in the status file."""
+        for task_id in task_ids:
+            lock = self._task_lock(task_id)
+            if not lock.acquire(blocking=blocking):
+                continue
+            try:
+                if self.tasks.pop(task_id, None) is not None:
+                    self._changed()
+                    self._journal({'id': task_id, 'removed': True})
+                # Also remove from processes if exists
+                self.processes.pop(task_id, None)
+                self._pidfds.pop(task_id, None)
+                self.task_events.pop(task_id, None)
+                self._task_locks.pop(task_id, None)
+            finally:
+                lock.release()
+        
+        # Only needed when the latest task of some type was removed
+        if any(self._latest_by_type.get(self._task_type(task_id)) == task_id and task_id not in self.tasks
+               for task_id in task_ids):
+            self._rebuild_latest_index()
+    
+    def _submit(self, fn):
+        """Run fn on an idle worker thread, starting a new one if all are busy."""
+        with self._workers_lock:
+            start_worker = self._idle_workers == 0
+            if not start_worker:
+                self._idle_workers -= 1
+        self._work.put(fn)
+        if start_worker:
+            threading.Thread(target=self._worker, name='task-worker', daemon=True).start()
+    
+    def _worker(self):
+        """Run submitted functions, one at a time, forever."""
+        while True:
+            fn = self._work.get()
+            try:
+                fn()
+            except Exception as e:
+                logger.error("Task worker error: %s", e)
+            with self._workers_lock:
+                self._idle_workers += 1
     
     def _run_task(self, task_id: str, script_name: str, args: list = None, metadata: dict = None):
-        """Run a task in background thread."""
-        # Security: Whitelist of allowed scripts
-        ALLOWED_SCRIPTS = {
-            'run_scraper.py',
-            'run_version_scraper.py',
-            'run_downloader.py',
-            'run_description_downloader.py',
-            'run_index_search.py'
+        """Run a task on a background worker thread; returns the event set when it finishes."""
+        # Created before the thread starts so callers can wait on it right away
+        done_event = threading.Event()
+        self.task_events[task_id] = done_event
+
+        # Stored before the thread starts so the task can be found (and cancelled) right away
+        started = time.time()
+        task = {
+            'status': 'running',
+            'started_at': datetime.fromtimestamp(started).isoformat(),
+            'started_at_ts': started,
+            'script': script_name,
+            'progress': 0,
+            'message': 'Starting...',
+            'current_action': 'Initializing...'
         }
+        if metadata:
+            task.update(metadata)
+        self._put_task(task_id, task)
 
         def run():
-            with self.lock:
-                self.tasks[task_id] = {
-                    'status': 'running',
-                    'started_at': datetime.now().isoformat(),
-                    'script': script_name,
-                    'progress': 0,
-                    'message': 'Starting...',
-                    'current_action': 'Initializing...'
-                }
-                if metadata:
-                    self.tasks[task_id].update(metadata)
-
-                self._save_status()
-
+            process = None
+            pidfd = None
             try:
                 # Security: Validate script_name is in whitelist
                 if script_name not in ALLOWED_SCRIPTS:
                     error_msg = f"Script not allowed: {script_name}. Only whitelisted scripts can be executed."
                     logger.error(error_msg)
-                    with self.lock:
-                        self.tasks[task_id]['status'] = 'failed'
-                        self.tasks[task_id]['message'] = error_msg
-                        self.tasks[task_id]['finished_at'] = datetime.now().isoformat()
-                        self.tasks[task_id]['error'] = error_msg
-                        self._save_status()
+                    self._update_task(
+                        task_id,
+                        status='failed',
+                        message=error_msg,
+                        finished_at=datetime.now().isoformat(),
+                        error=error_msg
+                    )
                     return
 
                 # Security: Validate script_name doesn't contain path traversal
-                if '..' in script_name or '/' in script_name or '\\' in script_name:
+                if _PATH_TRAVERSAL_RE.search(script_name):
                     error_msg = f"Invalid script name: {script_name}"
                     logger.error(error_msg)
-                    with self.lock:
-                        self.tasks[task_id]['status'] = 'failed'
-                        self.tasks[task_id]['message'] = error_msg
-                        self.tasks[task_id]['finished_at'] = datetime.now().isoformat()
-                        self.tasks[task_id]['error'] = error_msg
-                        self._save_status()
+                    self._update_task(
+                        task_id,
+                        status='failed',
+                        message=error_msg,
+                        finished_at=datetime.now().isoformat(),
+                        error=error_msg
+                    )
                     return
 
-                # Get base directory
-                base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                script_path = os.path.join(base_dir, script_name)
-                
-                # Try to use Python from venv, fallback to system Python
-                python_exe = 'python'
-                venv_python = os.path.join(base_dir, 'venv', 'Scripts', 'python.exe')
-                if os.path.exists(venv_python):
-                    python_exe = venv_python
-                    logger.info(f"Using venv Python: {python_exe}")
-                else:
-                    logger.info(f"Using system Python: {python_exe}")
-                
-                # Verify script exists
-                if not os.path.exists(script_path):
-                    raise FileNotFoundError(f"Script not found: {script_path}")
+                base_dir = _BASE_DIR
+                logger.info("Using Python: %s", _PYTHON_EXE)
                 
                 # Build command
-                cmd = [python_exe, script_path]
+                cmd = [_PYTHON_EXE, _script_path(script_name)]
                 if args:
                     cmd.extend(args)
                 
-                logger.info(f"Starting task {task_id}: {' '.join(cmd)}")
-                logger.info(f"Working directory: {base_dir}")
-                
-                # Prepare environment
-                env = os.environ.copy()
-                # Ensure Python path includes the project directory
-                pythonpath = env.get('PYTHONPATH', '')
-                if pythonpath:
-                    env['PYTHONPATH'] = f"{base_dir};{pythonpath}" if os.name == 'nt' else f"{base_dir}:{pythonpath}"
-                else:
-                    env['PYTHONPATH'] = base_dir
+                logger.info("Starting task %s: %s", task_id, ' '.join(cmd))
+                logger.info("Working directory: %s", base_dir)
                 
                 # Run process
                 # Use UTF-8 encoding explicitly to avoid Windows charmap codec errors
@@ -169,168 +635,177 @@ class TaskManager:
                     text=True,
                     encoding='utf-8',
                     errors='replace',  # Replace invalid characters instead of failing
-                    bufsize=1,
-                    env=env,
-                    shell=False
+                    bufsize=65536,  # Large pipe reads; lines are still returned as soon as they arrive
+                    env=self._child_env,
+                    shell=False,
+                    # Own process group, so cancelling also stops the script's children
+                    start_new_session=True,
+                    creationflags=getattr(subprocess, 'CREATE_NEW_PROCESS_GROUP', 0)
                 )
+                # Refers to this process even after its PID is reused; closed below
+                pidfd = _pidfd_open(process.pid)
                 
                 # Update status and store process
-                with self.lock:
-                    self.tasks[task_id]['pid'] = process.pid
-                    self.tasks[task_id]['message'] = 'Running...'
-                    self.tasks[task_id]['current_action'] = 'Initializing...'
-                    self.processes[task_id] = process  # Store process for cancellation
-                    self._save_status()
+                with self._task_lock(task_id):
+                    if self.tasks.get(task_id, {}).get('status') == 'cancelled':
+                        # Cancelled while starting; the output loop below ends when it exits
+                        _stop_process_group(process, pidfd=pidfd)
+                    else:
+                        self.processes[task_id] = process  # Store process for cancellation
+                        if pidfd is not None:
+                            self._pidfds[task_id] = pidfd
+                        self._update_task(task_id, pid=process.pid, message='Running...', current_action='Initializing...')
                 
-                # Read output in real-time and update status
-                stdout_lines = []
+                # Read output in real-time and update status, keeping only the tail
+                stdout_lines = deque(maxlen=OUTPUT_TAIL_LINES)
                 update_counter = 0
 
-                # Read output line by line
-                for line in process.stdout:
-                    stdout_lines.append(line)
-                    line_stripped = line.strip()
-
-                    # Print output to console for real-time visibility
-                    if line_stripped:
-                        print(line_stripped)
-
-                    # Update status every 10 lines or on meaningful output
-                    update_counter += 1
-                    if line_stripped and (update_counter >= 10 or
-                                          any(keyword in line_stripped.lower() for keyword in
-                                              ['scraping', 'scrape', 'downloading', 'download',
-                                               'processing', 'process', 'saving', 'save',
-                                               'fetching', 'fetch', 'completed', 'starting'])):
-                        update_counter = 0
-
-                        # Extract meaningful current action
-                        current_action = line_stripped[:100] if len(line_stripped) > 100 else line_stripped
-
-                        # Filter out tqdm progress bars (contains |, █, or [time<time, speed])
-                        # Example: "Downloading: 49%|████▉ | 48/98 [00:20<00:23, 2.15file/s]"
-                        # Should extract only: "Downloading"
-                        if '|' in current_action and ('[' in current_action or '█' in current_action):
-                            # This looks like a tqdm progress bar
-                            # Extract only the text before the first '|' or '%'
-                            # Split by common separators
-                            parts = re.split(r'[|%:]', current_action)
-                            if parts and parts[0].strip():
-                                # Use the descriptive part before the progress bar
-                                current_action = parts[0].strip()
-                            else:
-                                # Skip updating current_action for pure progress bars
-                                current_action = None
-
-                        # Try to extract progress from patterns like "817/2290" or "Progress: 50%"
-                        progress = 0
-
-                        # Pattern 1: "817/2290" format
-                        match = re.search(r'(\d+)/(\d+)', line_stripped)
-                        if match:
-                            current = int(match.group(1))
-                            total = int(match.group(2))
-                            if total > 0:
-                                progress = int((current / total) * 100)
-
-                        # Pattern 2: "Progress: 50%" or "50%" format
-                        if progress == 0:
-                            match = re.search(r'(\d+)%', line_stripped)
-                            if match:
-                                progress = int(match.group(1))
-
-                        with self.lock:
+                # Read output as it arrives; lines read together are applied
+                # as one status update, so only the latest action/progress
+                # of a burst is written
+                for lines in _read_lines(process, pidfd):
+                    changes = {}
+                    for line in lines:
+                        stdout_lines.append(line)
+                        line_stripped = line.strip()
+
+                        # Print output to console for real-time visibility
+                        if line_stripped:
+                            print(line_stripped)
+
+                        # Update status every 10 lines or on meaningful output
+                        update_counter += 1
+                        if line_stripped and (update_counter >= 10 or _ACTION_RE.search(line_stripped)):
+                            update_counter = 0
+
+                            # Extract meaningful current action
+                            current_action = line_stripped[:100] if len(line_stripped) > 100 else line_stripped
+
+                            # Filter out tqdm progress bars (contains |, █, or [time<time, speed])
+                            # Example: "Downloading: 49%|████▉ | 48/98 [00:20<00:23, 2.15file/s]"
+                            # Should extract only: "Downloading"
+                            tqdm_match = _TQDM_RE.match(current_action)
+                            if tqdm_match:
+                                # This looks like a tqdm progress bar: use the descriptive part
+                                # before it, or skip updating current_action for pure progress bars
+                                current_action = tqdm_match.group(1).strip() or None
+
+                            # Try to extract progress from patterns like "817/2290" or "Progress: 50%"
+                            progress = 0
+
+                            if _DIGIT_RE.search(line_stripped):
+                                # Pattern 1: "817/2290" format
+                                match = _RATIO_RE.search(line_stripped)
+                                if match:
+                                    current = int(match.group(1))
+                                    total = int(match.group(2))
+                                    if total > 0:
+                                        progress = int((current / total) * 100)
+
+                                # Pattern 2: "Progress: 50%" or "50%" format
+                                if progress == 0:
+                                    match = _PERCENT_RE.search(line_stripped)
+                                    if match:
+                                        progress = int(match.group(1))
+
                             # Only update current_action if it's not None (not a pure progress bar)
                             if current_action is not None:
-                                self.tasks[task_id]['current_action'] = current_action
+                                changes['current_action'] = current_action
                             if progress > 0:
-                                self.tasks[task_id]['progress'] = min(progress, 100)  # Cap at 100%
-                            self._save_status()
+                                changes['progress'] = min(progress, 100)  # Cap at 100%
+                    if changes:
+                        self._update_task(task_id, **changes)
 
                 # Wait for process to complete
                 process.wait()
                 stdout = ''.join(stdout_lines)
                 
                 # Update final status
-                with self.lock:
-                    if process.returncode == 0:
-                        self.tasks[task_id]['status'] = 'completed'
-                        self.tasks[task_id]['message'] = 'Completed successfully'
-                        # Look for completion message in last output lines
-                        completion_message = 'Task completed successfully'
-                        if stdout:
-                            stdout_lines_list = stdout.split('\n')
-                            # Look for meaningful completion messages
-                            for line in reversed(stdout_lines_list[-20:]):
-                                line_stripped = line.strip()
-                                if line_stripped and any(keyword in line_stripped.lower() for keyword in
-                                                        ['completed successfully', 'finished', 'done', '[ok]']):
-                                    completion_message = line_stripped[:100]
-                                    break
-                        self.tasks[task_id]['current_action'] = completion_message
-                    else:
-                        self.tasks[task_id]['status'] = 'failed'
-                        self.tasks[task_id]['message'] = f'Failed with code {process.returncode}'
-
-                        # Save full output (last 3000 chars) - includes both stdout and stderr
-                        error_output = ""
-                        if stdout:
-                            error_output = stdout[-3000:] if len(stdout) > 3000 else stdout
-
-                        if error_output:
-                            self.tasks[task_id]['error'] = error_output
-                            # Try to extract key error message
-                            error_lines = error_output.split('\n')
-                            error_message_found = False
-                            for line in reversed(error_lines):
-                                line_stripped = line.strip()
-                                if line_stripped and (
-                                    'error' in line_stripped.lower() or
-                                    '❌' in line_stripped or
-                                    'failed' in line_stripped.lower() or
-                                    'exception' in line_stripped.lower() or
-                                    'traceback' in line_stripped.lower()
-                                ):
-                                    # Extract meaningful error message
-                                    if len(line_stripped) > 200:
-                                        self.tasks[task_id]['message'] = line_stripped[:197] + '...'
-                                        self.tasks[task_id]['current_action'] = line_stripped[:197] + '...'
-                                    else:
-                                        self.tasks[task_id]['message'] = line_stripped
-                                        self.tasks[task_id]['current_action'] = line_stripped
-                                    error_message_found = True
-                                    break
+                changes = {}
+                if process.returncode == 0:
+                    changes['status'] = 'completed'
+                    changes['message'] = 'Completed successfully'
+                    # Look for completion message in last output lines
+                    completion_message = 'Task completed successfully'
+                    if stdout:
+                        # Look for meaningful completion messages
+                        line = _find_last_line(stdout, _DONE_RE, max_lines=20)
+                        if line:
+                            completion_message = line[:100]
+                    changes['current_action'] = completion_message
+                else:
+                    changes['status'] = 'failed'
+                    changes['message'] = f'Failed with code {process.returncode}'
 
-                            # If no specific error found, use generic failed message
-                            if not error_message_found:
-                                self.tasks[task_id]['current_action'] = f'Task failed with exit code {process.returncode}'
-                    
-                    # Save full output for debugging (last 2000 chars)
+                    # Save full output (last 3000 chars) - includes both stdout and stderr
+                    error_output = ""
                     if stdout:
-                        self.tasks[task_id]['output'] = stdout[-2000:] if len(stdout) > 2000 else stdout
-                    
-                    self.tasks[task_id]['finished_at'] = datetime.now().isoformat()
-                    self.tasks[task_id]['return_code'] = process.returncode
-                    self.tasks[task_id]['progress'] = 100
-                    self._save_status()
+                        error_output = stdout[-3000:] if len(stdout) > 3000 else stdout
+
+                    if error_output:
+                        changes['error'] = error_output
+                        # Try to extract key error message
+                        line = _find_last_line(error_output, _ERROR_RE)
+                        if line:
+                            # Extract meaningful error message
+                            if len(line) > 200:
+                                line = line[:197] + '...'
+                            changes['message'] = line
+                            changes['current_action'] = line
+                        else:
+                            # If no specific error found, use generic failed message
+                            changes['current_action'] = f'Task failed with exit code {process.returncode}'
+                
+                # Save full output for debugging (last 2000 chars)
+                if stdout:
+                    changes['output'] = stdout[-2000:] if len(stdout) > 2000 else stdout
                 
-                logger.info(f"Task {task_id} finished with code {process.returncode}")
+                changes['finished_at'] = datetime.now().isoformat()
+                changes['return_code'] = process.returncode
+                changes['progress'] = 100
+                with self._task_lock(task_id):
+                    if self.tasks.get(task_id, {}).get('status') == 'cancelled':
+                        # cancel_task already recorded the outcome; only add the output
+                        changes = {k: v for k, v in changes.items() if k in ('output', 'error')}
+                    self._update_task(task_id, **changes)
+                
+                logger.info("Task %s finished with code %s", task_id, process.returncode)
                 if process.returncode != 0:
                     error_preview = stdout[-500:] if stdout and len(stdout) > 500 else (stdout if stdout else 'No output')
-                    logger.error(f"Task {task_id} error output: {error_preview}")
+                    logger.error("Task %s error output: %s", task_id, error_preview)
                 
             except Exception as e:
-                with self.lock:
-                    self.tasks[task_id]['status'] = 'failed'
-                    self.tasks[task_id]['message'] = f'Error: {str(e)}'
-                    self.tasks[task_id]['finished_at'] = datetime.now().isoformat()
-                    self.tasks[task_id]['error'] = str(e)
-                    self._save_status()
-                logger.error(f"Task {task_id} error: {str(e)}")
+                self._update_task(
+                    task_id,
+                    status='failed',
+                    message=f'Error: {str(e)}',
+                    finished_at=datetime.now().isoformat(),
+                    error=str(e)
+                )
+                logger.error("Task %s error: %s", task_id, e)
+            finally:
+                # The process has exited; release it and its pipe right away
+                with self._task_lock(task_id):
+                    # Once unlisted, cancel_task can no longer be using the pidfd
+                    self.processes.pop(task_id, None)
+                    self._pidfds.pop(task_id, None)
+                if pidfd is not None:
+                    os.close(pidfd)
+                if process is not None:
+                    process.stdout.close()
+                # Set on every exit path, after the final status is stored
+                done_event.set()
         
-        thread = threading.Thread(target=run, daemon=True)
-        thread.start()
-        return thread
+        self._submit(run)
+        return done_event
+    
+    def _wait_for_task(self, task_id: str) -> Optional[Dict]:
+        """Block until a task started by _run_task() finishes and return its status."""
+        event = self.task_events.get(task_id)
+        if event is not None:
+            event.wait()
+            self.task_events.pop(task_id, None)
+        return self.get_task_status(task_id)
     
     def start_scrape_apps(self, resume: bool = False) -> str:
         """Start app scraping task."""
@@ -388,150 +863,117 @@ class TaskManager:
         Returns:
             Pipeline task ID
         """
-        import time
-        
         pipeline_id = f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
+        started = time.time()
+        self._put_task(pipeline_id, {
+            'status': 'running',
+            'started_at': datetime.fromtimestamp(started).isoformat(),
+            'started_at_ts': started,
+            'script': 'pipeline',
+            'progress': 0,
+            'message': 'Step 1/4: Scraping apps...',
+            'current_step': 1,
+            'total_steps': 4,
+            'steps': []
+        })
+        # Set by cancel_task(pipeline_id); stops the pipeline before its next step
+        cancel_event = threading.Event()
+        self._pipeline_cancel[pipeline_id] = cancel_event
+        
         def run_pipeline():
             """Run all tasks sequentially."""
             steps = []
             
-            try:
-                # Step 1: Scrape Apps
-                logger.info(f"[Pipeline {pipeline_id}] Starting step 1: Scrape Apps")
-                with self.lock:
-                    self.tasks[pipeline_id] = {
-                        'status': 'running',
-                        'started_at': datetime.now().isoformat(),
-                        'script': 'pipeline',
-                        'progress': 0,
-                        'message': 'Step 1/4: Scraping apps...',
-                        'current_step': 1,
-                        'total_steps': 4,
-                        'steps': []
-                    }
-                    self._save_status()
-                
-                task_id_1 = self.start_scrape_apps(resume=resume_scrape)
-                steps.append({'name': 'Scrape Apps', 'task_id': task_id_1, 'status': 'running'})
+            def run_step(number: int, name: str, start_step):
+                """Start a step and wait for it; raise if it did not complete."""
+                if cancel_event.is_set():
+                    raise Exception(f"Cancelled before step {number} ({name})")
+                task_id = start_step()
+                steps.append({'name': name, 'task_id': task_id, 'status': 'running'})
+                self._update_task(pipeline_id, current_task_id=task_id)
+                if cancel_event.is_set():
+                    # cancel_task() may have looked for the step before it was recorded
+                    self.cancel_task(task_id)
                 
                 # Wait for completion
-                while True:
-                    time.sleep(5)
-                    status = self.get_task_status(task_id_1)
-                    if not status:
-                        break
-                    if status.get('status') in ['completed', 'failed']:
-                        steps[-1]['status'] = status.get('status')
-                        if status.get('status') == 'failed':
-                            raise Exception(f"Step 1 (Scrape Apps) failed: {status.get('message', 'Unknown error')}")
-                        break
+                status = self._wait_for_task(task_id)
+                if status:
+                    steps[-1]['status'] = status.get('status')
+                    if status.get('status') in ('failed', 'cancelled'):
+                        raise Exception(f"Step {number} ({name}) {status['status']}: {status.get('message', 'Unknown error')}")
+            
+            try:
+                # Step 1: Scrape Apps
+                logger.info("[Pipeline %s] Starting step 1: Scrape Apps", pipeline_id)
+                run_step(1, 'Scrape Apps', lambda: self.start_scrape_apps(resume=resume_scrape))
                 
                 # Step 2: Scrape Versions
-                logger.info(f"[Pipeline {pipeline_id}] Starting step 2: Scrape Versions")
-                with self.lock:
-                    self.tasks[pipeline_id]['progress'] = 25
-                    self.tasks[pipeline_id]['message'] = 'Step 2/4: Scraping versions...'
-                    self.tasks[pipeline_id]['current_step'] = 2
-                    self._save_status()
-                
-                task_id_2 = self.start_scrape_versions()
-                steps.append({'name': 'Scrape Versions', 'task_id': task_id_2, 'status': 'running'})
-                
-                # Wait for completion
-                while True:
-                    time.sleep(5)
-                    status = self.get_task_status(task_id_2)
-                    if not status:
-                        break
-                    if status.get('status') in ['completed', 'failed']:
-                        steps[-1]['status'] = status.get('status')
-                        if status.get('status') == 'failed':
-                            raise Exception(f"Step 2 (Scrape Versions) failed: {status.get('message', 'Unknown error')}")
-                        break
+                logger.info("[Pipeline %s] Starting step 2: Scrape Versions", pipeline_id)
+                self._update_task(pipeline_id, progress=25, message='Step 2/4: Scraping versions...', current_step=2)
+                run_step(2, 'Scrape Versions', self.start_scrape_versions)
                 
                 # Step 3: Download Binaries
-                logger.info(f"[Pipeline {pipeline_id}] Starting step 3: Download Binaries")
-                with self.lock:
-                    self.tasks[pipeline_id]['progress'] = 50
-                    self.tasks[pipeline_id]['message'] = 'Step 3/4: Downloading binaries...'
-                    self.tasks[pipeline_id]['current_step'] = 3
-                    self._save_status()
-                
-                task_id_3 = self.start_download_binaries(product=download_product)
-                steps.append({'name': 'Download Binaries', 'task_id': task_id_3, 'status': 'running'})
-                
-                # Wait for completion
-                while True:
-                    time.sleep(5)
-                    status = self.get_task_status(task_id_3)
-                    if not status:
-                        break
-                    if status.get('status') in ['completed', 'failed']:
-                        steps[-1]['status'] = status.get('status')
-                        if status.get('status') == 'failed':
-                            raise Exception(f"Step 3 (Download Binaries) failed: {status.get('message', 'Unknown error')}")
-                        break
+                logger.info("[Pipeline %s] Starting step 3: Download Binaries", pipeline_id)
+                self._update_task(pipeline_id, progress=50, message='Step 3/4: Downloading binaries...', current_step=3)
+                run_step(3, 'Download Binaries', lambda: self.start_download_binaries(product=download_product))
                 
                 # Step 4: Download Descriptions
-                logger.info(f"[Pipeline {pipeline_id}] Starting step 4: Download Descriptions")
-                with self.lock:
-                    self.tasks[pipeline_id]['progress'] = 75
-                    self.tasks[pipeline_id]['message'] = 'Step 4/4: Downloading descriptions...'
-                    self.tasks[pipeline_id]['current_step'] = 4
-                    self._save_status()
-                
-                task_id_4 = self.start_download_descriptions(download_media=download_media)
-                steps.append({'name': 'Download Descriptions', 'task_id': task_id_4, 'status': 'running'})
-                
-                # Wait for completion
-                while True:
-                    time.sleep(5)
-                    status = self.get_task_status(task_id_4)
-                    if not status:
-                        break
-                    if status.get('status') in ['completed', 'failed']:
-                        steps[-1]['status'] = status.get('status')
-                        if status.get('status') == 'failed':
-                            raise Exception(f"Step 4 (Download Descriptions) failed: {status.get('message', 'Unknown error')}")
-                        break
+                logger.info("[Pipeline %s] Starting step 4: Download Descriptions", pipeline_id)
+                self._update_task(pipeline_id, progress=75, message='Step 4/4: Downloading descriptions...', current_step=4)
+                run_step(4, 'Download Descriptions', lambda: self.start_download_descriptions(download_media=download_media))
                 
                 # All steps completed
-                with self.lock:
-                    self.tasks[pipeline_id]['status'] = 'completed'
-                    self.tasks[pipeline_id]['progress'] = 100
-                    self.tasks[pipeline_id]['message'] = 'All steps completed successfully!'
-                    self.tasks[pipeline_id]['finished_at'] = datetime.now().isoformat()
-                    self.tasks[pipeline_id]['steps'] = steps
-                    self._save_status()
+                self._update_task(
+                    pipeline_id,
+                    status='completed',
+                    progress=100,
+                    message='All steps completed successfully!',
+                    finished_at=datetime.now().isoformat(),
+                    steps=steps
+                )
                 
-                logger.info(f"[Pipeline {pipeline_id}] All steps completed successfully")
+                logger.info("[Pipeline %s] All steps completed successfully", pipeline_id)
                 
             except Exception as e:
-                with self.lock:
-                    self.tasks[pipeline_id]['status'] = 'failed'
-                    self.tasks[pipeline_id]['message'] = f'Pipeline failed: {str(e)}'
-                    self.tasks[pipeline_id]['finished_at'] = datetime.now().isoformat()
-                    self.tasks[pipeline_id]['steps'] = steps
-                    self.tasks[pipeline_id]['error'] = str(e)
-                    self._save_status()
-                logger.error(f"[Pipeline {pipeline_id}] Failed: {str(e)}")
+                if cancel_event.is_set():
+                    # cancel_task() already recorded the outcome
+                    self._update_task(pipeline_id, message='Cancelled by user', steps=steps)
+                    logger.info("[Pipeline %s] Cancelled: %s", pipeline_id, e)
+                else:
+                    self._update_task(
+                        pipeline_id,
+                        status='failed',
+                        message=f'Pipeline failed: {str(e)}',
+                        finished_at=datetime.now().isoformat(),
+                        steps=steps,
+                        error=str(e)
+                    )
+                    logger.error("[Pipeline %s] Failed: %s", pipeline_id, e)
+            finally:
+                self._pipeline_cancel.pop(pipeline_id, None)
         
         # Run pipeline in background thread
-        thread = threading.Thread(target=run_pipeline, daemon=True)
-        thread.start()
+        self._submit(run_pipeline)
         
         return pipeline_id
     
     def get_task_status(self, task_id: str) -> Optional[Dict]:
         """Get status of a task."""
-        with self.lock:
-            return self.tasks.get(task_id)
+        return self.tasks.get(task_id)
     
     def get_all_tasks(self) -> Dict:
-        """Get all tasks."""
-        with self.lock:
-            return self.tasks.copy()
+        """Get all tasks.
+
+        The returned dict is shared between callers until tasks change, so it
+        must not be modified.
+        """
+        version = self._version
+        snapshot_version, tasks = self._snapshot
+        if snapshot_version != version:
+            tasks = self.tasks.copy()
+            self._snapshot = (version, tasks)
+        return tasks
     
     def cancel_task(self, task_id: str) -> bool:
         """
@@ -543,171 +985,106 @@ class TaskManager:
         Returns:
             True if task was cancelled, False otherwise
         """
-        with self.lock:
-            if task_id not in self.tasks:
-                logger.warning(f"Task {_sanitize_for_log(task_id)} not found for cancellation")
-                return False
-            
-            task = self.tasks[task_id]
+        if task_id not in self.tasks:
+            logger.warning("Task %s not found for cancellation", _sanitize_for_log(task_id))
+            return False
+        
+        with self._task_lock(task_id):
+            task = self.tasks.get(task_id, {})
             current_status = task.get('status')
             
             # Check if task is running
             if current_status != 'running':
                 # If task is already completed/failed/cancelled, we can't cancel it
-                if current_status in ['completed', 'failed', 'cancelled']:
-                    logger.warning(f"Task {_sanitize_for_log(task_id)} is already {current_status}, cannot cancel")
+                if current_status in FINAL_STATUSES:
+                    logger.warning("Task %s is already %s, cannot cancel", _sanitize_for_log(task_id), current_status)
                     return False
                 # For other statuses (e.g., 'pending'), mark as cancelled anyway
-                logger.info(f"Task {_sanitize_for_log(task_id)} is not running (status: {current_status}), marking as cancelled")
-                self.tasks[task_id]['status'] = 'cancelled'
-                self.tasks[task_id]['message'] = f'Cancelled by user (was {current_status})'
-                self.tasks[task_id]['finished_at'] = datetime.now().isoformat()
-                self._save_status()
-                return True
+                logger.info("Task %s is not running (status: %s), marking as cancelled", _sanitize_for_log(task_id), current_status)
+                return self._mark_cancelled(task_id, f'Cancelled by user (was {current_status})')
+            
+            cancel_event = self._pipeline_cancel.get(task_id)
+            if cancel_event is not None:
+                # Stop the pipeline; the step it is running is cancelled below
+                cancel_event.set()
+                self._mark_cancelled(task_id, 'Cancelled by user')
+                step_id = task.get('current_task_id')
+            else:
+                step_id = None
+        
+        if cancel_event is not None:
+            # Without the pipeline's lock: cancelling the step may wait for its process to exit
+            if step_id:
+                self.cancel_task(step_id)
+            logger.info("Pipeline %s cancelled", _sanitize_for_log(task_id))
+            return True
+        
+        with self._task_lock(task_id):
+            task = self.tasks.get(task_id, {})
+            if task.get('status') != 'running':
+                # Finished between the two locked sections
+                logger.warning("Task %s is already %s, cannot cancel", _sanitize_for_log(task_id), task.get('status'))
+                return False
             
-            # Try to get process object
             process = self.processes.get(task_id)
+            pidfd = self._pidfds.get(task_id)
+            pid = process.pid if process else task.get('pid')
+            if not pid:
+                # No PID available, but task is marked as running
+                # This can happen if task was loaded from file but process was lost
+                logger.warning("Task %s has no process object or PID, but status is 'running'. Marking as cancelled.", _sanitize_for_log(task_id))
+                return self._mark_cancelled(task_id, 'Cancelled by user (process not found, likely already finished)')
             
-            if process:
-                try:
-                    # Terminate the process
-                    if os.name == 'nt':  # Windows
-                        # On Windows, use terminate() which sends SIGTERM
-                        process.terminate()
-                        # Wait a bit, then force kill if needed
-                        try:
-                            process.wait(timeout=5)
-                        except subprocess.TimeoutExpired:
-                            process.kill()
-                            logger.info(f"Force killed task {_sanitize_for_log(task_id)}")
-                    else:  # Unix-like
-                        process.terminate()
-                        try:
-                            process.wait(timeout=5)
-                        except subprocess.TimeoutExpired:
-                            process.kill()
-                            logger.info(f"Force killed task {_sanitize_for_log(task_id)}")
-                    
-                    # Update task status
-                    self.tasks[task_id]['status'] = 'cancelled'
-                    self.tasks[task_id]['message'] = 'Cancelled by user'
-                    self.tasks[task_id]['finished_at'] = datetime.now().isoformat()
-                    self.tasks[task_id]['return_code'] = -1
-                    
-                    # Remove process from storage
-                    del self.processes[task_id]
-                    
-                    self._save_status()
-                    logger.info(f"Task {_sanitize_for_log(task_id)} cancelled successfully")
-                    return True
-
-                except Exception as e:
-                    logger.error(f"Error cancelling task {_sanitize_for_log(task_id)}: {str(e)}")
-                    # Try to kill by PID as fallback
-                    pid = task.get('pid')
-                    if pid:
-                        try:
-                            if os.name == 'nt':  # Windows
-                                os.kill(pid, signal.SIGTERM)
-                            else:
-                                os.kill(pid, signal.SIGTERM)
-                            
-                            self.tasks[task_id]['status'] = 'cancelled'
-                            self.tasks[task_id]['message'] = 'Cancelled by user (via PID)'
-                            self.tasks[task_id]['finished_at'] = datetime.now().isoformat()
-                            self.tasks[task_id]['return_code'] = -1
-                            
-                            if task_id in self.processes:
-                                del self.processes[task_id]
-                            
-                            self._save_status()
-                            logger.info(f"Task {_sanitize_for_log(task_id)} cancelled via PID")
-                            return True
-                        except Exception as pid_error:
-                            logger.error(f"Failed to cancel task {_sanitize_for_log(task_id)} via PID: {str(pid_error)}")
-                            return False
-                    return False
-            else:
-                # Process object not available, try by PID
-                pid = task.get('pid')
-                if pid:
-                    try:
-                        # Check if process is still running (Windows)
-                        if os.name == 'nt':  # Windows
-                            try:
-                                # Signal 0 doesn't kill, just checks if process exists
-                                os.kill(pid, 0)
-                            except ProcessLookupError:
-                                # Process already finished
-                                logger.warning(f"Task {_sanitize_for_log(task_id)} process (PID {pid}) already finished")
-                                self.tasks[task_id]['status'] = 'cancelled'
-                                self.tasks[task_id]['message'] = 'Cancelled by user (process already finished)'
-                                self.tasks[task_id]['finished_at'] = datetime.now().isoformat()
-                                self._save_status()
-                                return True
-                            except PermissionError:
-                                # Process exists but we don't have permission
-                                logger.warning(f"Task {_sanitize_for_log(task_id)} process (PID {pid}) exists but no permission to kill")
-                                # Mark as cancelled anyway
-                                self.tasks[task_id]['status'] = 'cancelled'
-                                self.tasks[task_id]['message'] = 'Cancelled by user (marked as cancelled)'
-                                self.tasks[task_id]['finished_at'] = datetime.now().isoformat()
-                                self._save_status()
-                                return True
-                            
-                            # Process exists, try to terminate it
-                            os.kill(pid, signal.SIGTERM)
-                        else:  # Unix-like
-                            os.kill(pid, signal.SIGTERM)
-                        
-                        self.tasks[task_id]['status'] = 'cancelled'
-                        self.tasks[task_id]['message'] = 'Cancelled by user (via PID)'
-                        self.tasks[task_id]['finished_at'] = datetime.now().isoformat()
-                        self.tasks[task_id]['return_code'] = -1
-                        
-                        if task_id in self.processes:
-                            del self.processes[task_id]
-                        
-                        self._save_status()
-                        logger.info(f"Task {_sanitize_for_log(task_id)} cancelled via PID")
-                        return True
-                    except ProcessLookupError:
-                        # Process already finished
-                        logger.warning(f"Task {_sanitize_for_log(task_id)} process (PID {pid}) already finished")
-                        self.tasks[task_id]['status'] = 'cancelled'
-                        self.tasks[task_id]['message'] = 'Cancelled by user (process already finished)'
-                        self.tasks[task_id]['finished_at'] = datetime.now().isoformat()
-                        self._save_status()
-                        return True
-                    except Exception as e:
-                        logger.error(f"Failed to cancel task {_sanitize_for_log(task_id)} via PID: {str(e)}")
-                        # Even if we can't kill the process, mark task as cancelled
-                        # This handles cases where process is already dead or we lost track of it
-                        self.tasks[task_id]['status'] = 'cancelled'
-                        self.tasks[task_id]['message'] = f'Cancelled by user (marked as cancelled, error: {str(e)})'
-                        self.tasks[task_id]['finished_at'] = datetime.now().isoformat()
-                        self._save_status()
-                        logger.info(f"Task {_sanitize_for_log(task_id)} marked as cancelled despite error")
-                        return True
+            try:
+                if process:
+                    _stop_process_group(process, pidfd=pidfd)
                 else:
-                    # No PID available, but task is marked as running
-                    # This can happen if task was loaded from file but process was lost
-                    logger.warning(f"Task {_sanitize_for_log(task_id)} has no process object or PID, but status is 'running'. Marking as cancelled.")
-                    self.tasks[task_id]['status'] = 'cancelled'
-                    self.tasks[task_id]['message'] = 'Cancelled by user (process not found, likely already finished)'
-                    self.tasks[task_id]['finished_at'] = datetime.now().isoformat()
-                    self._save_status()
-                    return True
+                    # PID from the status file: it may now belong to an unrelated
+                    # process, so never signal its whole process group
+                    os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                # Process already finished
+                logger.warning("Task %s process (PID %s) already finished", _sanitize_for_log(task_id), pid)
+                return self._mark_cancelled(task_id, 'Cancelled by user (process already finished)')
+            except Exception as e:
+                logger.error("Failed to cancel task %s: %s", _sanitize_for_log(task_id), e)
+                if process:
+                    return False
+                # Even if we can't kill the process, mark task as cancelled
+                # This handles cases where process is already dead or we lost track of it
+                return self._mark_cancelled(task_id, f'Cancelled by user (marked as cancelled, error: {str(e)})')
+            
+            # Recorded before the process exits, so the task's final update keeps it (see _run_task)
+            self._mark_cancelled(task_id, 'Cancelled by user', return_code=-1)
+            if pidfd is not None:
+                pidfd = os.dup(pidfd)  # _run_task closes its copy once the task is unlisted
+        
+        # Wait without the task lock: the task's thread must keep reading the
+        # output (and updating the task) while the script shuts down
+        try:
+            if process and not _wait_exited(process, 5, pidfd):
+                _stop_process_group(process, force=True, pidfd=pidfd)
+                logger.info("Force killed task %s", _sanitize_for_log(task_id))
+        except ProcessLookupError:
+            pass  # Exited just after the wait timed out
+        finally:
+            if pidfd is not None:
+                os.close(pidfd)
+        
+        logger.info("Task %s cancelled successfully", _sanitize_for_log(task_id))
+        return True
+    
+    def _mark_cancelled(self, task_id: str, message: str, **changes) -> bool:
+        """Record a task as cancelled and forget its process."""
+        self.processes.pop(task_id, None)
+        self._pidfds.pop(task_id, None)
+        self._update_task(task_id, status='cancelled', message=message,
+                          finished_at=datetime.now().isoformat(), **changes)
+        return True
     
     def get_latest_task(self, task_type: str) -> Optional[Dict]:
         """Get latest task of specific type."""
-        with self.lock:
-            matching = {k: v for k, v in self.tasks.items() if k.startswith(task_type)}
-            if not matching:
-                return None
-            # Sort by started_at and return latest
-            latest = max(matching.items(), key=lambda x: x[1].get('started_at', ''))
-            return latest[1]
+        return self.tasks.get(self._latest_by_type.get(task_type))
     
     def clear_completed_tasks(self) -> int:
         """
@@ -716,22 +1093,15 @@ class TaskManager:
         Returns:
             Number of tasks cleared
         """
-        with self.lock:
-            to_remove = []
-            for task_id, task in self.tasks.items():
-                status = task.get('status', '')
-                if status in ['completed', 'failed', 'cancelled']:
-                    to_remove.append(task_id)
-            
-            for task_id in to_remove:
-                del self.tasks[task_id]
-                # Also remove from processes if exists
-                if task_id in self.processes:
-                    del self.processes[task_id]
-            
-            self._save_status()
-            logger.info(f"Cleared {len(to_remove)} completed/failed/cancelled tasks")
-            return len(to_remove)
+        to_remove = []
+        for task_id, task in self.tasks.copy().items():
+            status = task.get('status', '')
+            if status in FINAL_STATUSES:
+                to_remove.append(task_id)
+        
+        self._remove_tasks(to_remove)
+        logger.info("Cleared %s completed/failed/cancelled tasks", len(to_remove))
+        return len(to_remove)
     
     def get_task_log_file(self, task_id: str) -> Optional[str]:
         """
@@ -751,42 +1121,25 @@ class TaskManager:
         
         # For pipeline tasks, check the current step to determine which log to use
         if script == 'pipeline':
-            current_step = task.get('current_step', 0)
-            # Pipeline steps:
-            # 1 = Scrape Apps -> scraper.log
-            # 2 = Scrape Versions -> scraper.log
-            # 3 = Download Binaries -> download.log
-            # 4 = Download Descriptions -> description_downloader.log
-            if current_step in [1, 2]:
-                return os.path.join(settings.LOGS_DIR, 'scraper.log')
-            elif current_step == 3:
-                return os.path.join(settings.LOGS_DIR, 'download.log')
-            elif current_step == 4:
-                return os.path.join(settings.LOGS_DIR, 'description_downloader.log')
-            else:
-                # Default to scraper.log for pipeline if step is unknown
-                return os.path.join(settings.LOGS_DIR, 'scraper.log')
+            # Default to scraper.log for pipeline if step is unknown
+            return _PIPELINE_STEP_LOG_FILES.get(task.get('current_step', 0), _SCRAPER_LOG)
         
-        log_file_map = {
-            'run_scraper.py': 'scraper.log',
-            'run_version_scraper.py': 'scraper.log',
-            'run_downloader.py': 'download.log',
-            'run_description_downloader.py': 'description_downloader.log'
-        }
-        
-        log_filename = log_file_map.get(script)
-        if log_filename:
-            return os.path.join(settings.LOGS_DIR, log_filename)
-        return None
+        return _LOG_FILES.get(script)
 
 
 # Global task manager instance
 _task_manager = None
+_task_manager_lock = threading.Lock()
 
 def get_task_manager() -> TaskManager:
     """Get global task manager instance."""
     global _task_manager
-    if _task_manager is None:
-        _task_manager = TaskManager()
-    return _task_manager
+    task_manager = _task_manager
+    if task_manager is None:
+        # Only the first call needs the lock; later calls return the instance directly
+        with _task_manager_lock:
+            if _task_manager is None:
+                _task_manager = TaskManager()
+            task_manager = _task_manager
+    return task_manager
 
@@ -158,7 +158,7 @@ from scraper.metadata_store import MetadataStore
 from scraper.download_manager import DownloadManager
 from utils.logger import get_logger
 from utils.task_manager import get_task_manager
-from utils.settings_manager import read_env_settings, update_env_setting
+from utils.settings_manager import read_env_settings, update_env_settings
 from utils.auth import requires_auth
 
 logger = get_logger('web')
@@ -1395,6 +1395,7 @@ def register_routes(app):
             
             updated = []
             errors = []
+            pending = {}
             
             for key, value in data.items():
                 if key not in allowed_settings:
@@ -1413,11 +1414,15 @@ def register_routes(app):
                     errors.append(f"Invalid value for '{key}': must be a number")
                     continue
                 
-                # Update setting
-                if update_env_setting(key, str(value)):
-                    updated.append(key)
-                else:
-                    errors.append(f"Failed to update '{key}'")
+                pending[key] = str(value)
+            
+            # Write all valid settings to .env at once
+            if pending:
+                for key, ok in update_env_settings(pending).items():
+                    if ok:
+                        updated.append(key)
+                    else:
+                        errors.append(f"Failed to update '{key}'")
             
             if errors:
                 return jsonify({
@@ -1486,6 +1491,7 @@ def register_routes(app):
             
             updated = []
             errors = []
+            pending = {}
             
             for key, value in data.items():
                 if key not in allowed_paths:
@@ -1501,11 +1507,15 @@ def register_routes(app):
                 # Empty paths are allowed (will use defaults)
                 normalized_path = os.path.normpath(value.strip()) if value.strip() else ''
                 
-                # Update setting
-                if update_env_setting(key, normalized_path):
-                    updated.append(key)
-                else:
-                    errors.append(f"Failed to update '{key}'")
+                pending[key] = normalized_path
+            
+            # Write all valid paths to .env at once
+            if pending:
+                for key, ok in update_env_settings(pending).items():
+                    if ok:
+                        updated.append(key)
+                    else:
+                        errors.append(f"Failed to update '{key}'")
             
             if errors:
                 return jsonify({